@@ -0,0 +1,155 @@
+import os
+import sys
+import time
+import resource
+import inspect
+import importlib
+import subprocess
+import datetime as dt
+import numpy as np
+import pandas as pd
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+from EITP.SDE.MV.GBM import GeometricBrownianMotion
+from EITP.Auxiliaries.SolverTuning import getProfile
+
+# Cache of the synthetic returns per (N, M, seed)
+DATAPATH = "./Results/Benchmark/SyntheticReturnsIndexFactor_{}x{}_seed{}.npz"
+
+# Model classes of the suite and the kind of grid their solve() sweeps
+MODELS = {"ITMDRO": "dro", "TrackingModelDRO": "dro", "RAERMDRO": "dro", "ExcessCVaRModelDRO": "dro",
+          "ExcessCVaRModelDROCorrelation": "correlation", "ExcessCVaRModelDROCorrelationFast": "correlation",
+          "ITMSAA": "saa", "TrackingModelSAA": "saa", "RAERMSAA": "saa", "ExcessCVaRModelSAA": "saa"}
+
+def syntheticReturns(N, M, seed=0, path=DATAPATH):
+
+    # Daily returns of an index and M assets from a one-factor GBM (cached, since the data only depends on the seed and the
+    # dimensions). The index has its own loading and idiosyncratic noise, so it is not in the span of the assets and no
+    # portfolio tracks it exactly.
+    path = path.format(N, M, seed)
+    if os.path.exists(path):
+        data = np.load(path)
+        return data["returnsAssets"], data["returnsIndex"]
+
+    rng = np.random.default_rng(seed)
+    mu = np.concatenate([[0.08], rng.uniform(0.0, 0.15, M)])
+    loadings = np.concatenate([[1.0], rng.uniform(0.5, 1.5, M)])
+    idiosyncratic = np.concatenate([[0.05], rng.uniform(0.1, 0.3, M)])
+    covariance = 0.15**2*np.outer(loadings, loadings) + np.diag(idiosyncratic**2) # -> Market factor plus idiosyncratic noise
+    SIGMA = np.linalg.cholesky(covariance)
+
+    # The index is the first series
+    prices = GeometricBrownianMotion(mu=mu, SIGMA=SIGMA, tN=(N + 1)/252, dt=1/252, rng=rng).iloc[:, 1:].values
+    returns = (prices[1:, :]/prices[:-1, :] - 1)[:N, :]
+    returnsIndex, returnsAssets = returns[:, 0], returns[:, 1:]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez(path, returnsAssets=returnsAssets, returnsIndex=returnsIndex)
+    return returnsAssets, returnsIndex
+
+def solveArguments(model, kind, gridSize):
+
+    if kind == "saa":
+        arguments = dict(rhoCollection=np.linspace(0.5, 4, gridSize), betaCollection=np.array([0.95]))
+    else:
+        arguments = dict(epsCollection=10**np.linspace(-6, -1, gridSize), rhoCollection=np.array([2]), betaCollection=np.array([0.95]))
+
+    # Every grid point is solved (the large-radius shortcut would skip solves)
+    if "detectLimit" in inspect.signature(model.solve).parameters:
+        arguments["detectLimit"] = False
+
+    arguments["progressBar"] = False
+    return arguments
+
+def peakMemory():
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/(1024**2 if sys.platform == "darwin" else 1024)
+
+def runCase(modelName, N, M, gridSize, dataPath):
+
+    # Runs in a fresh process, so the peak resident memory belongs to this case only
+    data = np.load(dataPath)
+    returnsAssets, returnsIndex = data["returnsAssets"][:N, :M], data["returnsIndex"][:N]
+    modelClass = getattr(importlib.import_module("EITP.Models.{}".format(modelName)), modelName)
+    model = modelClass(returnsAssets=returnsAssets, returnsIndex=returnsIndex, beta=0.95, rho=2)
+    if hasattr(model, "rank"):
+        model.rank = min(10, M)
+
+    # The suite always measures the single-solve profile
+    model.solverProfile = getProfile([cls.__name__ for cls in modelClass.__mro__], "single")
+
+    memoryBefore = peakMemory()
+    start = time.perf_counter()
+    try:
+        results = model.solve(**solveArguments(model, MODELS[modelName], gridSize))
+        status = "ok"
+    except Exception as error:
+        results, status = None, "{}: {}".format(type(error).__name__, str(error)[:100])
+    totalTime = time.perf_counter() - start
+    memoryPeak = peakMemory()
+
+    # Build and solve times from the solve log (see InvestmentStrategy.solveModel)
+    solveLog = model.solveLogTable()
+    buildTime = float(solveLog["buildTime"].sum()) if len(solveLog) else np.nan
+    solveTime = float(solveLog["solveTime"].sum()) if len(solveLog) else np.nan
+
+    return {"model": modelName, "N": N, "M": M, "gridSize": gridSize, "status": status,
+            "buildTime": buildTime, "solveTime": solveTime, "totalTime": totalTime,
+            "solves": len(solveLog), "peakMemoryMB": memoryPeak, "solveMemoryMB": max(memoryPeak - memoryBefore, 0),
+            "obj": float(results["obj"].iloc[0]) if results is not None and len(results) else np.nan}
+
+def commitId():
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def runSuite(cases, seed=0, path="./Results/Benchmark/Scaling.csv"):
+
+    # cases is a list of (modelName, N, M, gridSize). The data is simulated once at the largest size and sliced.
+    NMax = max(case[1] for case in cases)
+    MMax = max(case[2] for case in cases)
+    syntheticReturns(NMax, MMax, seed=seed)
+    dataPath = DATAPATH.format(NMax, MMax, seed)
+
+    # One process per case (spawned, so no memory is inherited from this process)
+    records = []
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn"), max_tasks_per_child=1) as pool:
+        for modelName, N, M, gridSize in cases:
+            record = pool.submit(runCase, modelName, N, M, gridSize, dataPath).result()
+            print("{} (N, M, grid) = ({}, {}, {}): build {:.3f} s, solve {:.3f} s, peak memory {:.0f} MB, {}".format(
+                modelName, N, M, gridSize, record["buildTime"], record["solveTime"], record["peakMemoryMB"], record["status"]))
+            records.append(record)
+
+    # Append to the results of earlier commits
+    results = pd.DataFrame(records)
+    results.insert(0, "commit", commitId())
+    results.insert(1, "date", dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    results.insert(2, "seed", seed)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    results.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+    return results
+
+def compareCommits(path="./Results/Benchmark/Scaling.csv", baseline=None, current=None, threshold=1.2):
+
+    # Ratios of the times and memory of two commits (by default the last two in the file) per case
+    history = pd.read_csv(path)
+    commits = list(dict.fromkeys(history["commit"]))
+    current = commits[-1] if current is None else current
+    baseline = (commits[-2] if len(commits) > 1 else current) if baseline is None else baseline
+
+    keys = ["model", "N", "M", "gridSize"]
+    metrics = ["buildTime", "solveTime", "peakMemoryMB"]
+    before = history[history["commit"] == baseline].groupby(keys)[metrics].last()
+    after = history[history["commit"] == current].groupby(keys)[metrics].last()
+    ratios = (after/before).dropna(how="all")
+
+    # Cases that got slower or bigger than the threshold
+    regressions = ratios[(ratios > threshold).any(axis=1)]
+    if len(regressions):
+        print("Regressions of {} against {} (ratio above {}):\n{}".format(current, baseline, threshold, regressions.to_string()))
+    return ratios
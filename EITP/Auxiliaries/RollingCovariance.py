@@ -0,0 +1,118 @@
+import numpy as np
+from scipy.linalg import eigh
+
+class RollingCovariance:
+
+    def __init__(self, halfLife=None, ddof=1, refresh=250):
+
+        # Covariance of a window of observations, kept as weighted sums and cross-products that are updated in O(M^2) per
+        # observation entering or leaving the window. With halfLife (in observations) the weights decay exponentially with
+        # the age of the observations, otherwise they are equal. The sums are recomputed from the window after refresh
+        # updates to remove the accumulated rounding errors.
+        self.decay = 1.0 if halfLife is None else 0.5**(1/halfLife);
+        self.ddof = ddof;
+        self.refresh = refresh;
+
+        # Window (oldest observation first) and the time stamps of its rows
+        self.window = None;
+        self.stamps = None;
+        self.clock = 0;
+
+    # Method 1: Recompute the sums from scratch for a new window
+    def reset(self, X):
+
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64));
+        self.window = X.copy();
+        self.stamps = self.clock + np.arange(X.shape[0]) - X.shape[0] + 1;
+        self.updates = 0;
+
+        # Observations are shifted by the mean of the window, which keeps the cancellation in the covariance small
+        self.shift = np.mean(X, axis=0);
+        weights = self.decay**(self.clock - self.stamps);
+        shifted = X - self.shift;
+        self.sums = weights @ shifted;
+        self.crossSums = (shifted.T * weights) @ shifted;
+        self.weightSum = np.sum(weights);
+        self.squaredWeightSum = np.sum(weights**2);
+
+    # Method 2: Add new observations at the end of the window (older observations decay with exponential weighting)
+    def push(self, X):
+
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64));
+        d = X.shape[0];
+        if d == 0:
+            return;
+
+        # Weights of the new rows relative to the newest one
+        weights = self.decay**np.arange(d - 1, -1, -1);
+        shifted = X - self.shift;
+        self.sums = self.decay**d*self.sums + weights @ shifted;
+        self.crossSums = self.decay**d*self.crossSums + (shifted.T * weights) @ shifted;
+        self.weightSum = self.decay**d*self.weightSum + np.sum(weights);
+        self.squaredWeightSum = self.decay**(2*d)*self.squaredWeightSum + np.sum(weights**2);
+
+        self.clock += d;
+        self.window = np.vstack([self.window, X]);
+        self.stamps = np.concatenate([self.stamps, self.clock + np.arange(d) - d + 1]);
+        self.countUpdate(d);
+
+    # Method 3: Remove the count oldest observations of the window
+    def pop(self, count):
+
+        if count <= 0:
+            return;
+
+        weights = self.decay**(self.clock - self.stamps[:count]);
+        shifted = self.window[:count,:] - self.shift;
+        self.sums = self.sums - weights @ shifted;
+        self.crossSums = self.crossSums - (shifted.T * weights) @ shifted;
+        self.weightSum = self.weightSum - np.sum(weights);
+        self.squaredWeightSum = self.squaredWeightSum - np.sum(weights**2);
+
+        self.window = self.window[count:,:];
+        self.stamps = self.stamps[count:];
+        self.countUpdate(count);
+
+    # Method 4: Move to a new window, reusing the observations it shares with the current one. Sliding windows (the
+    # oldest rows leave, new rows enter) and expanding windows cost O(M^2) per changed observation, anything else resets.
+    def update(self, X):
+
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64));
+        if self.window is None or self.window.shape[1] != X.shape[1]:
+            self.reset(X);
+            return;
+
+        # Smallest number of leaving rows such that the rest of the window starts the new data (checks are O(N M))
+        n = self.window.shape[0];
+        for leaving in np.flatnonzero((self.window == X[0]).all(axis=1)):
+            overlap = n - leaving;
+            if overlap <= X.shape[0] and np.array_equal(self.window[leaving:,:], X[:overlap,:]):
+                self.pop(leaving);
+                self.push(X[overlap:,:]);
+                return;
+
+        self.reset(X);
+
+    # Method 5: Recompute the sums after refresh updates
+    def countUpdate(self, count):
+
+        self.updates += count;
+        if self.updates >= self.refresh:
+            self.reset(self.window);
+
+    # Method 6: Covariance matrix of the window (with reliability weights if the weights are not equal)
+    def covariance(self):
+
+        mean = self.sums/self.weightSum;
+        return (self.crossSums - self.weightSum*np.outer(mean, mean))/(self.weightSum - self.ddof*self.squaredWeightSum/self.weightSum);
+
+    # Method 7: Factor representation covariance ~ V diag(d) V' from the rank leading eigenpairs (only those are computed)
+    def factors(self, rank):
+
+        covariance = self.covariance();
+        M = covariance.shape[0];
+        rank = min(rank, M);
+        eigenvalues, eigenvectors = eigh(covariance, subset_by_index=[M - rank, M - 1]);
+
+        # Largest eigenvalue first
+        return eigenvectors[:, ::-1], np.maximum(eigenvalues[::-1], 0);
@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import itertools
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+# Tuned MOSEK parameters per model class and execution mode, e.g. {"ITMDRO": {"single": {...}, "batch": {...}}}
+PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "SolverProfiles.json")
+
+# Default grid of MOSEK parameters (numThreads = 0 lets MOSEK decide)
+DEFAULT_GRID = {"numThreads": [0, 1, 4],
+                "presolveUse": ["on", "off"],
+                "optimizer": ["intpnt", "primalSimplex", "dualSimplex"]}
+
+# Profiles are read once per process
+profiles = None
+
+def executionMode():
+
+    # Solves inside the worker processes of a parallel batch share the cores with the other workers
+    return "batch" if multiprocessing.parent_process() is not None else "single"
+
+def loadProfiles(path=PROFILE_PATH, reload=False):
+
+    global profiles
+
+    if profiles is None or reload:
+        profiles = {}
+        if os.path.exists(path):
+            with open(path, 'r') as file:
+                profiles = json.load(file)
+
+    return profiles
+
+def saveProfile(modelName, mode, profile, path=PROFILE_PATH):
+
+    # Only the profile of this model class and mode is replaced
+    allProfiles = loadProfiles(path, reload=True)
+    allProfiles.setdefault(modelName, {})[mode] = profile
+
+    with open(path, 'w') as file:
+        json.dump(allProfiles, file, indent=4, sort_keys=True)
+
+def getProfile(modelNames, mode):
+
+    # The first class in modelNames (most specific first) with a tuned profile for the mode is used
+    allProfiles = loadProfiles()
+    for name in modelNames:
+        if mode in allProfiles.get(name, {}):
+            return allProfiles[name][mode]
+
+    return {}
+
+def profileGrid(grid):
+
+    names = list(grid.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*[grid[name] for name in names])]
+
+def timeSolve(model, solveArguments):
+
+    # Wall time (build and solve) and objective of the first grid point, inf if the solve fails
+    start = time.perf_counter()
+    try:
+        results = model.solve(**solveArguments)
+    except Exception as error:
+        print("Solve failed with profile {}: {}".format(model.solverProfile, error))
+        return np.inf, np.nan
+
+    elapsed = time.perf_counter() - start
+    if results is None or len(results) == 0:
+        return np.inf, np.nan
+
+    return elapsed, float(results["obj"].iloc[0])
+
+def tuneProfiles(modelClass, instances, solveArguments={}, grid=DEFAULT_GRID, mode="single", workers=4, repeats=1, objTol=1e-4, save=True):
+
+    # instances is a list of keyword arguments for the constructor of modelClass, e.g. dict(returnsAssets=..., returnsIndex=...).
+    # In single mode the instances are solved one after another, in batch mode they are solved by a pool of workers and
+    # the wall time of the whole batch is measured.
+    solveArguments = dict(solveArguments, progressBar=False)
+    records = []
+    reference = None
+
+    for profile in profileGrid(grid):
+
+        models = [modelClass(**instance) for instance in instances]
+        for model in models:
+            model.solverProfile = profile
+
+        # Best of a few repetitions
+        bestTime, objectives = np.inf, None
+        for repeat in range(repeats):
+
+            start = time.perf_counter()
+            if mode == "batch":
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    timings = list(pool.map(timeSolve, models, [solveArguments]*len(models)))
+            else:
+                timings = [timeSolve(model, solveArguments) for model in models]
+            wallTime = time.perf_counter() - start
+
+            # A profile that fails on any instance is discarded
+            if np.any(np.isinf([timing[0] for timing in timings])):
+                wallTime = np.inf
+
+            if wallTime < bestTime:
+                bestTime, objectives = wallTime, np.array([timing[1] for timing in timings])
+
+        # Profiles must reach the same optimum as the first profile that solves every instance
+        if np.isfinite(bestTime):
+            if reference is None:
+                reference = objectives
+            elif np.any(np.abs(objectives - reference) > objTol*np.maximum(1, np.abs(reference))):
+                print("Profile {} is discarded since its objectives differ.".format(profile))
+                bestTime = np.inf
+
+        records.append([profile, bestTime])
+        print("Profile {}: {:.3f} s".format(profile, bestTime))
+
+    tuning = pd.DataFrame(records, columns=["profile", "time"]).sort_values("time").reset_index(drop=True)
+
+    # Persist the fastest profile
+    if save and np.isfinite(tuning["time"].iloc[0]):
+        saveProfile(modelClass.__name__, mode, tuning["profile"].iloc[0])
+
+    return tuning
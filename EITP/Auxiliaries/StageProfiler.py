@@ -0,0 +1,73 @@
+import os
+import time
+import cProfile
+import pandas as pd
+
+class StageProfiler:
+
+    def __init__(self, name="Backtest", profileDirectory=None):
+
+        # Full cProfile dumps per window are switched on by the environment variable EITP_PROFILE, whose value is the
+        # output directory ("1" means ./Results/Profiles/). Without it only the stage timings are recorded.
+        setting = os.environ.get("EITP_PROFILE", "") if profileDirectory is None else profileDirectory;
+        self.profileDirectory = "./Results/Profiles/" if setting == "1" else (setting or None);
+        if self.profileDirectory is not None:
+            os.makedirs(self.profileDirectory, exist_ok=True);
+
+        # Timings as (window, stage, seconds)
+        self.name = name;
+        self.records = [];
+
+        # Current window and stage
+        self.window = None;
+        self.currentStage = None;
+        self.stageStart = None;
+        self.profile = None;
+
+    # Method 1: Start a new window (e.g. one rebalance date), the previous window is closed
+    def startWindow(self, window):
+
+        self.endWindow();
+        self.window = window;
+
+        if self.profileDirectory is not None:
+            self.profile = cProfile.Profile();
+            self.profile.enable();
+
+    # Method 2: Close the current stage and start timing the next one, so the stages of a window add up to its duration
+    def stage(self, name):
+
+        now = time.perf_counter();
+        if self.currentStage is not None:
+            self.records.append((self.window, self.currentStage, now - self.stageStart));
+
+        self.currentStage = name;
+        self.stageStart = now;
+
+    # Method 3: Close the current stage and window and dump the cProfile statistics of the window
+    def endWindow(self):
+
+        if self.currentStage is not None:
+            self.records.append((self.window, self.currentStage, time.perf_counter() - self.stageStart));
+            self.currentStage = None;
+
+        if self.profile is not None:
+            self.profile.disable();
+            self.profile.dump_stats(os.path.join(self.profileDirectory, "{}_{}.prof".format(self.name, self.window)));
+            self.profile = None;
+
+    # Method 4: Seconds per window and stage
+    def windowTable(self):
+
+        records = pd.DataFrame(self.records, columns=["window", "stage", "seconds"]);
+        return records.pivot_table(index="window", columns="stage", values="seconds", aggfunc="sum", sort=False);
+
+    # Method 5: Per-stage breakdown over all windows (total, mean per window and share of the total time)
+    def summary(self):
+
+        self.endWindow();
+        records = pd.DataFrame(self.records, columns=["window", "stage", "seconds"]);
+        summary = records.groupby("stage", sort=False)["seconds"].agg(["sum", "count", "mean"]);
+        summary.columns = ["total", "count", "mean"];
+        summary["share"] = summary["total"]/summary["total"].sum();
+        return summary.sort_values("total", ascending=False);
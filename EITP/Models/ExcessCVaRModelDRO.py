@@ -9,17 +9,17 @@ import sys
 
 class ExcessCVaRModelDRO(InvestmentStrategy):
 
-    def __init__(self, returnsAssets=np.ones((10,9)), returnsIndex=np.ones((10,1)), beta=0.95, rho=0.00, alpha=0.00, cardinality=False):
+    def __init__(self, returnsAssets=np.ones((10,9)), returnsIndex=np.ones((10,1)), beta=0.95, rho=0.00, alpha=0.00, cardinality=False, maxCardinality=10):
 
         # Call constructor from parent class (see InvestmentStrategy.py)
         super().__init__(returnsAssets=returnsAssets, returnsIndex=returnsIndex, beta=beta, rho=rho, alpha=alpha)
         self.cardinality = cardinality;
+        self.maxCardinality = maxCardinality;
 
-    # Method: Solve model with MOSEK Fusion API
-    def solve(self, epsCollection=np.linspace(10**(-8), 10**(-1), 100), rhoCollection=np.array([2]),
-              betaCollection=np.array([0.95]), progressBar=True):
+    # Method: Build the model with MOSEK Fusion API
+    def buildModel(self):
 
-        MODEL = Model("ExcessCVaRModelDRO");
+        MODEL = self.createModel("ExcessCVaRModelDRO");
 
         # --------- Constants ---------
         delta = 0; # -> Shorting limit
@@ -29,6 +29,7 @@ class ExcessCVaRModelDRO(InvestmentStrategy):
 
         # --------- Parameters ---------
         eps = MODEL.parameter("WassersteinRadius"); # -> radius with respect to 1-norm
+        alpha = MODEL.parameter("Alpha"); # -> Spread of the enhanced index
         betaMod = MODEL.parameter("BetaMod"); # -> Quantile for Expected Shortfall
         rho = MODEL.parameter("Rho"); # -> Penalty for CVaR
         a1_vec_param = MODEL.parameter("a1_vec_param"); # -> Penalty for CVaR
@@ -53,97 +54,231 @@ class ExcessCVaRModelDRO(InvestmentStrategy):
         MODEL.constraint('budgetConstraint', Expr.sum(w), Domain.equalsTo(1.0));
 
         # Definition of affine functions (see derivation in thesis)
-        a_k = [Expr.mul(a1_vec_param, w), Expr.neg(w)];
-        b_k = [Expr.mul(nu, b1_vec_param), Expr.mul(nu, rho)];
+        a_k, b_k = self.affineExpressions(MODEL);
+
+        # Portfolio returns of the scenarios, shared by the affine pieces
+        r = self.portfolioReturns(MODEL, w);
 
         # Constraints related to DRO
         for k in range(K):
 
             # Define basic operations for clarity
             bkVec = Expr.mul(b_k[k], np.ones(N));
-            portfolioTerm = Expr.mul(self.excessReturns, a_k[k]);
+            portfolioTerm = Expr.mul(a_k[k], r);
 
             # Add the constraints
             MODEL.constraint('maximumAffine_{}'.format(k), Expr.sub(Expr.add(bkVec, portfolioTerm), s), Domain.lessThan(0.0));
-            MODEL.constraint('infinityNormReturn1_{}'.format(k), Expr.sub(a_k[k], Expr.mul(mOnes, _lambda)), Domain.lessThan(0.0));
-            MODEL.constraint('infinityNormReturn2_{}'.format(k), Expr.sub(Expr.mul(-1, a_k[k]), Expr.mul(mOnes, _lambda)), Domain.lessThan(0.0));
+
+        # Infinity norm: with w >= 0 only the steepest piece a_1 = -1-rho/(1-beta) binds
+        MODEL.constraint('infinityNormReturn', Expr.sub(Expr.mul(-1, Expr.mul(a_k[0], w)), Expr.mul(mOnes, _lambda)), Domain.lessThan(0.0));
 
         # Then we add cardinality constraints if specified
-        maxCardinality = 10;
         if self.cardinality:
+            maxCardinality = MODEL.parameter("MaxCardinality"); # -> Maximum number of assets held
             y = MODEL.variable("y", M, Domain.binary());
-            MODEL.constraint('cardinality', Expr.sum(y), Domain.lessThan(maxCardinality));
+            MODEL.constraint('cardinality', Expr.sub(Expr.sum(y), maxCardinality), Domain.lessThan(0.0));
             #MODEL.constraint('cardinality', Expr.sum(y), Domain.equalsTo(maxCardinality));
             MODEL.constraint('lessThanY', Expr.sub(w,y), Domain.lessThan(0.0));
+            maxCardinality.setValue(self.maxCardinality);
 
-            # Set solver params
-            #MODEL.setSolverParam("mioMaxTime", 30.0)
+            # Set solver params (the integer part of an initial point is completed into an incumbent, see setIncumbent)
             MODEL.setSolverParam("mioTolRelGap", 0.10)
+            MODEL.setSolverParam("mioConstructSol", "on")
             MODEL.setLogHandler(sys.stdout)
             #MODEL.setSolverParam("log", 1)
             MODEL.acceptedSolutionStatus(AccSolutionStatus.Feasible)
 
+        return MODEL;
+
+    # Method: Affine functions a_k*(xi'w) + b_k*nu in terms of the variables and parameters of a built model (see derivation in thesis)
+    def affineExpressions(self, MODEL):
+
+        # Get variables and parameters
+        nu = MODEL.getVariable("nu");
+        rho = MODEL.getParameter("Rho");
+        a1_vec_param = MODEL.getParameter("a1_vec_param");
+        b1_vec_param = MODEL.getParameter("b1_vec_param");
+
+        # Definition of affine functions (slopes a_k multiply the portfolio return xi'w)
+        a_k = [a1_vec_param, -1.0];
+        b_k = [Expr.mul(nu, b1_vec_param), Expr.mul(nu, rho)];
+
+        return a_k, b_k;
+
+    # Method: Coefficients of the affine pieces max_k a_k*(xi'w) + b_k*nu (see derivation in thesis)
+    def affineCoefficients(self, rho, beta):
+
+        a = np.array([-1-rho/(1-beta), -1]);
+        b = np.array([rho-rho/(1-beta), rho]);
+        return a, b;
+
+    # Method: Incumbent for the cardinality constraint by rounding the continuous relaxation of a built model
+    def relaxAndRound(self, MODEL):
+
+        # Solve with y relaxed to [0,1] and restore the binaries afterwards
+        y = MODEL.getVariable("y");
+        y.makeContinuous();
+        self.solveModel(MODEL, stage="relaxation");
+        y.makeInteger();
+
+        # The rounding itself happens in setIncumbent
+        if MODEL.getPrimalSolutionStatus() not in [SolutionStatus.Optimal, SolutionStatus.Feasible]:
+            return None;
+        return MODEL.getVariable("w").level();
+
+    # Method: Pass the maxCardinality largest weights of w0 as an initial integer point to a built model
+    def setIncumbent(self, MODEL, w0):
+
+        # Keep the largest weights and renormalize (MOSEK fixes y and re-solves for the continuous variables)
+        w0 = np.asarray(w0, dtype=np.float64);
+        y0 = np.zeros(len(w0));
+        y0[np.argsort(-w0, kind="stable")[:int(self.maxCardinality)]] = 1.0;
+        wRounded = np.maximum(w0, 0)*y0;
+        wRounded = wRounded/np.sum(wRounded) if np.sum(wRounded) > 0 else y0/np.sum(y0);
+
+        # Set levels
+        MODEL.getVariable("y").setLevel(y0);
+        MODEL.getVariable("w").setLevel(wRounded);
+
+    # Method: Solve model with MOSEK Fusion API
+    def solve(self, epsCollection=np.linspace(10**(-8), 10**(-1), 100), rhoCollection=np.array([2]),
+              betaCollection=np.array([0.95]), progressBar=True, warmStart=False, alphaCollection=None,
+              seedIncumbent=True, timeLimit=None):
+
+        # Reuse the model kept alive in rolling mode, otherwise build a new one
+        if self.rollingModel is not None:
+            self.useRollingWindow();
+            MODEL = self.rollingModel;
+        else:
+            MODEL = self.buildModel();
+
+        # --------- Constants ---------
+        N = self.excessReturns.shape[0]; # -> Number of scenarios
+        M = self.excessReturns.shape[1]; # -> Number of available assets to invest in
+
+        # --------- Parameters and variables of the built model ---------
+        eps = MODEL.getParameter("WassersteinRadius");
+        alpha = MODEL.getParameter("Alpha");
+        betaMod = MODEL.getParameter("BetaMod");
+        rho = MODEL.getParameter("Rho");
+        a1_vec_param = MODEL.getParameter("a1_vec_param");
+        b1_vec_param = MODEL.getParameter("b1_vec_param");
+        w = MODEL.getVariable("w");
+        _lambda = MODEL.getVariable("lambda");
+        nu = MODEL.getVariable("nu");
+
         # Record original objective
         recordedValues = ["obj", "eps", "rho", "beta", "excessReturns", "VaR", "CVaR"];
         columns = recordedValues + [i for i in range(1,M+1)];
         results = pd.DataFrame(columns=columns)
 
+        # Reuse the optimal basis between neighbouring grid points
+        self.iterations = [];
+        self.solveLog = [];
+        self.duals = [];
+        if warmStart:
+            self.warmStartSweep(MODEL);
+
+        # Under cardinality the first MIP is seeded by relax-and-round and later ones by the previous incumbent
+        incumbent = None;
+        if self.cardinality:
+            MODEL.getParameter("MaxCardinality").setValue(self.maxCardinality);
+            if timeLimit is not None:
+                MODEL.setSolverParam("mioMaxTime", timeLimit);
+
+        # Sweep alpha on the same model (rows are ordered by alpha first), by default only the alpha of the data
+        alphaData = self.alpha;
+        if alphaCollection is None:
+            alphaCollection = np.array([alphaData]);
+
         # Solve optimization
-        with tqdm(total=len(epsCollection)*len(rhoCollection)*len(betaCollection), disable=not(progressBar)) as pbar:
-            for epsNext in epsCollection:
-                for rhoNew in rhoCollection:
-                    for betaNew in betaCollection:
+        with tqdm(total=len(alphaCollection)*len(epsCollection)*len(rhoCollection)*len(betaCollection), disable=not(progressBar)) as pbar:
+            for alphaNext in alphaCollection:
+
+                # Shift the excess returns of the data and the model by the new spread
+                self.setAlpha(alphaNext);
+                alpha.setValue(alphaNext);
+
+                for epsNext in epsCollection:
+                    for rhoNew in rhoCollection:
+                        for betaNew in betaCollection:
+
+                            # Set parameters
+                            eps.setValue(epsNext);
+                            rho.setValue(rhoNew);
+                            betaMod.setValue(1/(1-betaNew));
+                            a1_vec_param.setValue(-1-rhoNew/(1-betaNew));
+                            b1_vec_param.setValue(rhoNew - rhoNew/(1-betaNew));
+
+                            # Seed the MIP
+                            if self.cardinality and seedIncumbent:
+                                if incumbent is None:
+                                    incumbent = self.relaxAndRound(MODEL);
+                                if incumbent is not None:
+                                    self.setIncumbent(MODEL, incumbent);
+
+                            # Solve model
+                            MODEL.setLogHandler(sys.stdout)
+                            self.solveModel(MODEL, alpha=alphaNext, eps=epsNext, rho=rhoNew, beta=betaNew);
+                            self.iterations.append(self.iterationCount(MODEL));
+
+                            # Switch to the simplex optimizer to hot-start the next grid point
+                            if warmStart:
+                                MODEL.setSolverParam("optimizer", "primalSimplex");
+
+                            # Print optimality gap under cardinality
+                            if self.cardinality:
+                                print("Relative optimality gap: {}".format(MODEL.getSolverDoubleInfo("mioObjRelGap")));
 
-                        # Set parameters
-                        eps.setValue(epsNext);
-                        rho.setValue(rhoNew);
-                        betaMod.setValue(1/(1-betaNew));
-                        a1_vec_param.setValue(-1-rhoNew/(1-betaNew));
-                        b1_vec_param.setValue(rhoNew - rhoNew/(1-betaNew));
+                            # Get problem status
+                            statusPrimal = MODEL.getPrimalSolutionStatus();
+                            statusDual = MODEL.getDualSolutionStatus();
+                            prosta = MODEL.getProblemStatus();
 
-                        # Solve model
-                        MODEL.setLogHandler(sys.stdout)
-                        MODEL.solve();
+                            # Check for optimality (a time limited MIP returns its best incumbent)
+                            if (prosta == ProblemStatus.PrimalFeasible) or (statusPrimal == SolutionStatus.Optimal and statusDual == SolutionStatus.Optimal) \
+                                    or (self.cardinality and statusPrimal == SolutionStatus.Feasible):
 
-                        # Print optimality gap under cardinality
-                        if self.cardinality:
-                            print("Relative optimality gap: {}".format(MODEL.getSolverDoubleInfo("mioObjRelGap")));
+                                # Carry the incumbent to the next grid point
+                                if self.cardinality:
+                                    incumbent = w.level();
 
-                        # Get problem status
-                        statusPrimal = MODEL.getPrimalSolutionStatus();
-                        statusDual = MODEL.getDualSolutionStatus();
-                        prosta = MODEL.getProblemStatus();
+                                # Compute CVaR
+                                excessReturns = np.dot(np.array(self.pi), self.excessReturns.dot(w.level()));
+                                VaR = nu.level()[0]
+                                CVaR = VaR + 1/(1-betaNew)*np.dot(np.array(self.pi), np.maximum(-self.excessReturns.dot(w.level()) - VaR, 0));
 
-                        # Check for optimality
-                        if (prosta == ProblemStatus.PrimalFeasible) or (statusPrimal == SolutionStatus.Optimal and statusDual == SolutionStatus.Optimal):
+                                # Save row
+                                row = pd.DataFrame([MODEL.primalObjValue(), eps.getValue()[0], rho.getValue()[0], -1/betaMod.getValue()[0]+1, excessReturns, VaR, CVaR] + list(w.level()), index=columns, columns=[0]);
 
-                            # Compute CVaR
-                            excessReturns = np.dot(np.array(self.pi), self.excessReturns.dot(w.level()));
-                            VaR = nu.level()[0]
-                            CVaR = VaR + 1/(1-betaNew)*np.mean(np.maximum(-self.excessReturns.dot(w.level()) - VaR, 0));
+                                # Concatenate with exisiting results
+                                results = pd.concat([results, row.T], axis=0);
 
-                            # Save row
-                            row = pd.DataFrame([MODEL.primalObjValue(), eps.getValue()[0], rho.getValue()[0], -1/betaMod.getValue()[0]+1, excessReturns, VaR, CVaR] + list(w.level()), index=columns, columns=[0]);
+                                # Duals for the reduced-cost check in solveScreened (a MIP has none)
+                                if not self.cardinality:
+                                    self.recordDuals(MODEL);
 
-                            # Concatenate with exisiting results
-                            results = pd.concat([results, row.T], axis=0);
+                            else:
+                                print("Solution could not be found for epsilon = {}.".format(epsNext));
+                                print(prosta);
 
-                        else:
-                            print("Solution could not be found for epsilon = {}.".format(epsNext));
-                            print(prosta);
+                            pbar.update(1);
 
-                        pbar.update(1);
+        # Restore the spread of the data
+        self.setAlpha(alphaData);
 
         # Set optimal portfolio
         self.optimalPortfolio = results.iloc[0, :];
         self.optimalPortfolio = self.optimalPortfolio.values[len(recordedValues):];
         self.isOptimal = True;
 
-        # Get rid of model
-        MODEL.dispose()
+        # Get rid of model (unless it is kept alive in rolling mode)
+        if self.rollingModel is None:
+            MODEL.dispose();
 
         # Set index
         results.index = [i for i in range(0, len(results))];
+        results.attrs['solveLog'] = self.solveLogTable(); # -> One record per solve (see solveModel)
         return results;
 
     def approximateObjective(self, returnsAssets, returnsIndex, w):
@@ -4,42 +4,51 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from mosek.fusion import *
 from tqdm import tqdm
-from EITP.Models.InvestmentStrategy import InvestmentStrategy;
+from EITP.Models.ExcessCVaRModelDROCorrelation import ExcessCVaRModelDROCorrelation;
 
-class ExcessCVaRModelDROCorrelation(InvestmentStrategy):
+class ExcessCVaRModelDROCorrelationFast(ExcessCVaRModelDROCorrelation):
 
-    def __init__(self, returnsAssets=np.ones((10,9)), returnsIndex=np.ones((10,1)), beta=0.95, rho=0.00, alpha=0.00, rf=0.002):
+    def __init__(self, returnsAssets=np.ones((10,9)), returnsIndex=np.ones((10,1)), beta=0.95, rho=0.00, alpha=0.00, rank=10, halfLife=None):
 
-        # Call constructor from parent class (see InvestmentStrategy.py)
-        super().__init__(returnsAssets=returnsAssets, returnsIndex=returnsIndex, beta=beta, rho=rho, alpha=alpha, rf=rf)
+        # Call constructor from parent class (see ExcessCVaRModelDROCorrelation.py)
+        super().__init__(returnsAssets=returnsAssets, returnsIndex=returnsIndex, beta=beta, rho=rho, alpha=alpha, halfLife=halfLife)
+        self.rank = rank;
 
-        # Compute covariance matrix
-        self.covarianceMatrix()
+    # Method: Low-rank factor approximation hatSigma ~ V diag(d) V' from the leading eigenpairs
+    def covarianceFactors(self):
 
-    def covarianceMatrix(self):
+        # Covariance of the current data (alpha does not change it), only the leading eigenpairs are computed
+        self.covarianceMatrix();
+        self.factorLoadings, self.factorVariances = self.covarianceEngine.factors(self.rank);
 
-        # Calculate covariance matrix
-        self.hatSigma = np.cov(self.excessReturns, rowvar=False)
+    # Method: Build the model with MOSEK Fusion API
+    def buildModel(self):
 
-    # Method: Solve model with MOSEK Fusion API
-    def solve(self, epsCollection=np.linspace(10**(-8), 10**(-1), 100), kappaCollection=np.array([1]), rhoCollection=np.array([2]),
-              betaCollection=np.array([0.95]), progressBar=True):
-
-        # Create model instance with MOSEK
-        MODEL = Model("GaoCorrelation");
+        # The moment constraint is only imposed on the variances of the r leading factors, i.e. Lambda = V diag(theta) V'.
+        # The inner supremum is then finite only if a_k - gamma_ik = V z_ik, and its value sum_j z_ikj^2/(4 theta_j)
+        # splits into r rotated cones of dimension 3 instead of one PSD block of size M+1 per scenario.
+        MODEL = self.createModel("GaoCorrelationFactor");
 
         # Define constants
         delta = 0; # -> Shorting limit
-        xi_hat = self.excessReturns; # -> Excess returns
         N = self.excessReturns.shape[0]; # -> Number of scenarios
         M = self.excessReturns.shape[1]; # -> Number of available assets to invest in
         K = 2; # -> Number of piecewise affine functions to describe loss function
-        m0 = np.zeros((M, 1)); # -> Zero vector
+
+        # Factors of the covariance matrix
+        self.covarianceFactors();
+        V = self.factorLoadings; # -> Loadings (M x r)
+        d = self.factorVariances; # -> Factor variances
+        r = V.shape[1]; # -> Rank of the approximation
+        zeta = self.trackingReturns.dot(V); # -> Factor returns of the scenarios before the spread alpha
+        loadingSums = V.T.dot(np.ones(M)); # -> Shift of the factor returns per unit of alpha
 
         # Define parameters
         eps = MODEL.parameter("WassersteinRadius"); # -> radius with respect to 1-norm
-        betaMod = MODEL.parameter("BetaMod"); # -> Quantile for Expected Shortfall
+        alpha = MODEL.parameter("Alpha"); # -> Spread of the enhanced index
+        kappa = MODEL.parameter("Kappa"); # -> Scaling of the moment constraint
         rho = MODEL.parameter("Rho"); # -> Penalty for CVaR
+        betaMod = MODEL.parameter("BetaMod"); # -> Quantile for Expected Shortfall
         a1_vec_param = MODEL.parameter("a1_vec_param"); # -> Penalty for CVaR
         b1_vec_param = MODEL.parameter("b1_vec_param"); # -> Penalty for CVaR
 
@@ -47,44 +56,144 @@ class ExcessCVaRModelDROCorrelation(InvestmentStrategy):
         _lambda = MODEL.variable("lambda", 1, Domain.unbounded()); # -> Lambda in optimization problem
         s = MODEL.variable("s_i", Domain.unbounded(N)); # -> Auxiliary variables
         w = MODEL.variable("w", M, Domain.greaterThan(delta)) # -> Weights in each asset
-        Lambda = MODEL.variable("Lambda", Domain.inPSDCone(M)); # -> Positive Semi-Definite Cone
+        theta = MODEL.variable("theta", r, Domain.greaterThan(0.0)); # -> Multipliers of the factor variances
         nu = MODEL.variable("nu"); # -> VaR in optimization problem
-        gamma = [MODEL.variable(f'gamma_{i}', M, Domain.unbounded(M)) for i in range(N)]
-        mOnes = np.ones((M, 1)); # -> Vector of ones
+        z = [MODEL.variable(f'z_{k}', [N, r], Domain.unbounded()) for k in range(K)]; # -> a_k - gamma_ik in factor coordinates
+        t = [MODEL.variable(f't_{k}', [N, r], Domain.greaterThan(0.0)) for k in range(K)]; # -> Epigraphs of z_ikj^2/(4 theta_j)
 
         # Define affine loss function
         a_k = [Expr.mul(a1_vec_param, w), Expr.neg(w)];
         b_k = [Expr.mul(nu, b1_vec_param), Expr.mul(nu, rho)];
 
+        # Portfolio returns of the scenarios, shared by the affine pieces with slopes a1 and -1
+        portfolioReturns = self.portfolioReturns(MODEL, w);
+        slopes = [a1_vec_param, -1.0];
+
         # Define the objective function
         firstTerm = Expr.mul(eps, _lambda);
         secondTerm = Expr.dot(self.pi, s);
-        frobeniusInnerProduct = Expr.dot(Lambda, kappaCollection[0]*self.hatSigma);
-        J = Expr.add(firstTerm, Expr.add(secondTerm, frobeniusInnerProduct));
+        momentTerm = Expr.mul(kappa, Expr.dot(d, theta));
+        J = Expr.add(firstTerm, Expr.add(secondTerm, momentTerm));
         MODEL.objective('obj', ObjectiveSense.Minimize, J);
 
+        # Auxiliaries
+        thetaRows = Expr.mul(np.ones((N, 1)), Expr.reshape(Expr.mul(2.0, theta), 1, r));
+        lambdaMatrix = Expr.repeat(Expr.repeat(Expr.reshape(_lambda.asExpr(), 1, 1), N, 0), M, 1);
+
         # Define constraints
-        for i in range(N):
-            for k in range(K):
-                print(i,k)
-
-                # Segment PSD matrix into 4 parts
-                Q11 = Lambda
-                Q12 = Expr.sub(Expr.add(Expr.mul(-0.5, a_k[k]), Expr.mul(0.5, gamma[i])), Expr.mul(Lambda, m0))
-                Q21 = Expr.transpose(Q12)
-                Q22 = Expr.add(Expr.neg(b_k[k]), Expr.add(Expr.dot(gamma[i], xi_hat[i]), Expr.add(Expr.dot(m0, Expr.mul(Lambda, m0)), s.index(i))))
-
-                # Combine into PSD matrix
-                constr_expr = Expr.vstack(
-                    Expr.hstack(Q11, Q12),
-                    Expr.hstack(Q21, Q22)
-                )
-
-                # Define the constraint
-                MODEL.constraint(f'PSD_constraint_{i}_{k}', constr_expr, Domain.inPSDCone())
-
-            # Define infinity norm (dual norm of 1-norm)
-            MODEL.constraint(f'infNormPos_{i}', Expr.sub(gamma[i], Expr.mul(mOnes, _lambda)), Domain.lessThan(0.0))
-            MODEL.constraint(f'infNormNeg_{i}', Expr.sub(Expr.mul(-1, gamma[i]), Expr.mul(mOnes, _lambda)), Domain.lessThan(0.0))
-
-        return 0
\ No newline at end of file
+        for k in range(K):
+
+            # s_i >= b_k + gamma_ik'xi_i + sum_j t_ikj with gamma_ik'xi_i = a_k'xi_i - z_ik'V'xi_i
+            bkVec = Expr.mul(b_k[k], np.ones(N));
+            portfolioTerm = Expr.mul(slopes[k], portfolioReturns);
+            factorTerm = Expr.sub(Expr.sum(Expr.mulElm(z[k], zeta), 1), Expr.mul(alpha, Expr.mul(z[k], loadingSums)));
+            quadraticTerm = Expr.sum(t[k], 1);
+            MODEL.constraint(f'maximumAffine_{k}', Expr.sub(Expr.add(Expr.sub(Expr.add(bkVec, portfolioTerm), factorTerm), quadraticTerm), s), Domain.lessThan(0.0));
+
+            # 4 theta_j t_ikj >= z_ikj^2
+            MODEL.constraint(f'factorCone_{k}', Expr.stack(2, thetaRows, t[k], z[k]), Domain.inRotatedQCone());
+
+            # Define infinity norm (dual norm of 1-norm) of gamma_ik = a_k - V z_ik
+            gammaMatrix = Expr.sub(Expr.mul(np.ones((N, 1)), Expr.reshape(a_k[k], 1, M)), Expr.mul(z[k], V.T));
+            MODEL.constraint(f'infNormPos_{k}', Expr.sub(gammaMatrix, lambdaMatrix), Domain.lessThan(0.0));
+            MODEL.constraint(f'infNormNeg_{k}', Expr.sub(Expr.neg(gammaMatrix), lambdaMatrix), Domain.lessThan(0.0));
+
+        # Portfolio constraints
+        MODEL.constraint('budgetConstraint', Expr.sum(w), Domain.equalsTo(1.0));
+
+        return MODEL;
+
+    # Method: Solve model with MOSEK Fusion API
+    def solve(self, epsCollection=np.linspace(10**(-8), 10**(-1), 100), kappaCollection=np.array([1.2]), rhoCollection=np.array([2]),
+              betaCollection=np.array([0.95]), progressBar=True, alphaCollection=None):
+
+        # Kappa is a parameter here, so the whole grid is solved on one model
+        MODEL = self.buildModel();
+
+        # Sweep alpha on the same model (rows are ordered by kappa and alpha first), by default only the alpha of the data
+        alphaData = self.alpha;
+        if alphaCollection is None:
+            alphaCollection = np.array([alphaData]);
+
+        # Parameters and variables of the built model
+        eps = MODEL.getParameter("WassersteinRadius");
+        alpha = MODEL.getParameter("Alpha");
+        kappa = MODEL.getParameter("Kappa");
+        rho = MODEL.getParameter("Rho");
+        betaMod = MODEL.getParameter("BetaMod");
+        a1_vec_param = MODEL.getParameter("a1_vec_param");
+        b1_vec_param = MODEL.getParameter("b1_vec_param");
+        w = MODEL.getVariable('w');
+        nu = MODEL.getVariable('nu');
+
+        # Save results
+        M = self.excessReturns.shape[1]
+        recordedValues = ["obj", "kappa", "eps", "rho", "beta", "excessReturns", "VaR", "CVaR"];
+        columns = recordedValues + [i for i in range(1,M+1)];
+        results = pd.DataFrame(columns=columns)
+        self.solveLog = [];
+
+        # Solve optimization
+        with tqdm(total=len(kappaCollection)*len(alphaCollection)*len(epsCollection)*len(rhoCollection)*len(betaCollection), disable=not(progressBar)) as pbar:
+            for kappaNext in kappaCollection:
+                for alphaNext in alphaCollection:
+
+                    # Shift the excess returns of the data and the model by the new spread
+                    self.setAlpha(alphaNext);
+                    alpha.setValue(alphaNext);
+
+                    for epsNext in epsCollection:
+                        for rhoNew in rhoCollection:
+                            for betaNew in betaCollection:
+
+                                # Set parameters
+                                kappa.setValue(kappaNext);
+                                eps.setValue(epsNext);
+                                rho.setValue(rhoNew);
+                                betaMod.setValue(1/(1-betaNew));
+                                a1_vec_param.setValue(-1-rhoNew/(1-betaNew));
+                                b1_vec_param.setValue(rhoNew - rhoNew/(1-betaNew));
+
+                                # Solve model
+                                self.solveModel(MODEL, kappa=kappaNext, alpha=alphaNext, eps=epsNext, rho=rhoNew, beta=betaNew);
+
+                                # Get problem status
+                                statusPrimal = MODEL.getPrimalSolutionStatus();
+                                statusDual = MODEL.getDualSolutionStatus();
+                                prosta = MODEL.getProblemStatus();
+
+                                # Check for optimality
+                                if statusPrimal == SolutionStatus.Optimal and statusDual == SolutionStatus.Optimal:
+
+                                    # Compute CVaR
+                                    excessReturns = np.dot(np.array(self.pi), self.excessReturns.dot(w.level()));
+                                    VaR = nu.level()[0]
+                                    CVaR = VaR + 1/(1-betaNew)*np.dot(np.array(self.pi), np.maximum(-self.excessReturns.dot(w.level()) - VaR, 0));
+
+                                    # Save row
+                                    row = pd.DataFrame([MODEL.primalObjValue(), kappaNext, eps.getValue()[0], rho.getValue()[0], -1/betaMod.getValue()[0]+1, excessReturns, VaR, CVaR] + list(w.level()), index=columns, columns=[0]);
+
+                                    # Concatenate with exisiting results
+                                    results = pd.concat([results, row.T], axis=0);
+
+                                else:
+                                    print("Solution could not be found for epsilon = {}.".format(epsNext));
+                                    print(prosta);
+
+                                pbar.update(1);
+
+        # Restore the spread of the data
+        self.setAlpha(alphaData);
+
+        # Get rid of model
+        MODEL.dispose()
+
+        # Set optimal portfolio
+        self.optimalPortfolio = results.iloc[0, :];
+        self.optimalPortfolio = self.optimalPortfolio.values[len(recordedValues):];
+        self.isOptimal = True;
+
+        # Set index
+        results.index = [i for i in range(0, len(results))];
+        results.attrs['solveLog'] = self.solveLogTable(); # -> One record per solve (see solveModel)
+        return results;
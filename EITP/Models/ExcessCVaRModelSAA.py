@@ -12,10 +12,10 @@ class ExcessCVaRModelSAA(InvestmentStrategy):
         super().__init__(returnsAssets=returnsAssets, returnsIndex=returnsIndex, beta=beta, rho=rho, alpha=alpha)
 
     # Implementation: Excess Returns with CVaR penalty
-    def solve(self, rhoCollection=np.linspace(0.1, 4, 40), betaCollection=np.array([0.8, 0.85, 0.90, 0.95, 0.99]), progressBar=True):
+    def solve(self, rhoCollection=np.linspace(0.1, 4, 40), betaCollection=np.array([0.8, 0.85, 0.90, 0.95, 0.99]), progressBar=True, alphaCollection=None):
 
         # Initialize model with MOSEK
-        MODEL = Model("ExcessCVaRModelSAA");
+        MODEL = self.createModel("ExcessCVaRModelSAA");
 
         # Get dimensions and constants
         delta = 0; # -> Shorting limit
@@ -25,6 +25,7 @@ class ExcessCVaRModelSAA(InvestmentStrategy):
         # Get parameters
         betaMod = MODEL.parameter("BetaMod"); # -> Quantile for Expected Shortfall
         rho = MODEL.parameter("Rho"); # -> Penalty for CVaR
+        alpha = MODEL.parameter("Alpha"); # -> Spread of the enhanced index
 
         # Decision variable (fraction of holdings in each security)
         w = MODEL.variable("w", N, Domain.greaterThan(delta))
@@ -35,57 +36,75 @@ class ExcessCVaRModelSAA(InvestmentStrategy):
         eCVaR = np.ones((self.N, 1));
         eBudget = np.ones((self.M, 1));
 
+        # Scenario returns of the portfolio
+        portfolioReturns = self.scenarioReturns(MODEL, w);
+
         # Objective
-        expectedExcessReturns = Expr.neg(Expr.dot(self.pi, Expr.mul(self.excessReturns, w)));
+        expectedExcessReturns = Expr.neg(Expr.dot(self.pi, portfolioReturns));
         expectedCVaR = Expr.add(nu, Expr.mul(betaMod, Expr.dot(self.pi, u)));
         MODEL.objective('obj', ObjectiveSense.Minimize, Expr.add(expectedExcessReturns, Expr.mul(rho, expectedCVaR)));
 
         # Portfolio constraints
         MODEL.constraint('budgetConstraint', Expr.dot(eBudget, w), Domain.equalsTo(1))
-        MODEL.constraint('CVaRConstraint', Expr.add(Expr.mul(self.excessReturns, w), Expr.add(Expr.mul(nu, eCVaR), u)), Domain.greaterThan(0.0))
+        MODEL.constraint('CVaRConstraint', Expr.add(portfolioReturns, Expr.add(Expr.mul(nu, eCVaR), u)), Domain.greaterThan(0.0))
 
         # Allocate memory
         recordedValues = ["obj", "rho", "beta", "excessReturns", "VaR", "CVaR"];
         columns = recordedValues + [i for i in range(1,N+1)];
         results = pd.DataFrame(columns=columns)
+        self.solveLog = [];
+
+        # Sweep alpha on the same model (rows are ordered by alpha first), by default only the alpha of the data
+        alphaData = self.alpha;
+        if alphaCollection is None:
+            alphaCollection = np.array([alphaData]);
+
+        with tqdm(total=len(alphaCollection)*len(rhoCollection)*len(betaCollection), disable=not(progressBar)) as pbar:
+            for alphaNext in alphaCollection:
+
+                # Shift the excess returns of the data and the model by the new spread
+                self.setAlpha(alphaNext);
+                alpha.setValue(alphaNext);
+
+                for rhoNew in rhoCollection:
+                    for betaNew in betaCollection:
 
-        with tqdm(total=len(rhoCollection)*len(betaCollection), disable=not(progressBar)) as pbar:
-            for rhoNew in rhoCollection:
-                for betaNew in betaCollection:
+                        # Set parameters
+                        betaMod.setValue(1/(1-betaNew));
+                        rho.setValue(rhoNew);
 
-                    # Set parameters
-                    betaMod.setValue(1/(1-betaNew));
-                    rho.setValue(rhoNew);
+                        # Solve optimization
+                        self.solveModel(MODEL, alpha=alphaNext, rho=rhoNew, beta=betaNew);
 
-                    # Solve optimization
-                    MODEL.solve();
+                        # Get problem status
+                        statusPrimal = MODEL.getPrimalSolutionStatus();
+                        statusDual = MODEL.getDualSolutionStatus();
+                        prosta = MODEL.getProblemStatus();
 
-                    # Get problem status
-                    statusPrimal = MODEL.getPrimalSolutionStatus();
-                    statusDual = MODEL.getDualSolutionStatus();
-                    prosta = MODEL.getProblemStatus();
+                        # Check for optimality
+                        if statusPrimal == SolutionStatus.Optimal and statusDual == SolutionStatus.Optimal:
 
-                    # Check for optimality
-                    if statusPrimal == SolutionStatus.Optimal and statusDual == SolutionStatus.Optimal:
+                            # Compute CVaR
+                            excessReturns = np.dot(np.array(self.pi), self.excessReturns.dot(w.level()));
+                            VaR = nu.level()[0]
+                            CVaR = VaR + 1/(1-betaNew)*np.dot(np.array(self.pi), np.maximum(-self.excessReturns.dot(w.level()) - VaR, 0));
 
-                        # Compute CVaR
-                        excessReturns = np.dot(np.array(self.pi), self.excessReturns.dot(w.level()));
-                        VaR = nu.level()[0]
-                        CVaR = VaR + 1/(1-betaNew)*np.mean(np.maximum(-self.excessReturns.dot(w.level()) - VaR, 0));
+                            # Save row
+                            row = pd.DataFrame([MODEL.primalObjValue(), rho.getValue()[0], betaNew,
+                                                excessReturns, VaR, CVaR] + list(w.level()), index=columns, columns=[0]);
 
-                        # Save row
-                        row = pd.DataFrame([MODEL.primalObjValue(), rho.getValue()[0], betaNew,
-                                            excessReturns, VaR, CVaR] + list(w.level()), index=columns, columns=[0]);
+                            # Concatenate with exisiting results
+                            results = pd.concat([results, row.T], axis=0);
 
-                        # Concatenate with exisiting results
-                        results = pd.concat([results, row.T], axis=0);
+                        else:
+                            print("Solution could not be found for (rho, beta) = ({},{}).".format(rhoNew, betaNew));
+                            print(prosta);
 
-                    else:
-                        print("Solution could not be found for (rho, beta) = ({},{}).".format(rhoNew, betaNew));
-                        print(prosta);
+                        # Update progress bar
+                        pbar.update(1);
 
-                    # Update progress bar
-                    pbar.update(1);
+        # Restore the spread of the data
+        self.setAlpha(alphaData);
 
         # Set optimal portfolio
         self.optimalPortfolio = results.iloc[0, :];
@@ -96,6 +115,9 @@ class ExcessCVaRModelSAA(InvestmentStrategy):
         MODEL.dispose()
 
         # Return the results
+        # Set index
+        results.index = [i for i in range(0, len(results))];
+        results.attrs['solveLog'] = self.solveLogTable(); # -> One record per solve (see solveModel)
         return results;
 
     def approximateObjective(self, returnsAssets, returnsIndex, w):
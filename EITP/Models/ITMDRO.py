@@ -1,3 +1,4 @@
+import time
 import datetime as dt
 import numpy as np
 import pandas as pd
@@ -5,6 +6,7 @@ import matplotlib.pyplot as plt
 from mosek.fusion import *
 from tqdm import tqdm
 from EITP.Models.InvestmentStrategy import InvestmentStrategy;
+from EITP.Models.PDHG import PDHG;
 
 class ITMDRO(InvestmentStrategy):
 
@@ -13,11 +15,10 @@ class ITMDRO(InvestmentStrategy):
         # Call constructor from parent class (see InvestmentStrategy.py)
         super().__init__(returnsAssets=returnsAssets, returnsIndex=returnsIndex, beta=beta, rho=rho, alpha=alpha)
 
-    # Method: Implement the model with MOSEK Fusion API
-    def solve(self, epsCollection=np.linspace(10**(-8), 10**(-1), 100), rhoCollection=np.array([2]),
-              betaCollection=np.array([0.95]), progressBar=True):
+    # Method: Build the model with MOSEK Fusion API
+    def buildModel(self):
 
-        MODEL = Model("TrackingModelDRO");
+        MODEL = self.createModel("TrackingModelDRO");
 
         # Settings
         # M.setLogHandler(sys.stdout)
@@ -30,6 +31,7 @@ class ITMDRO(InvestmentStrategy):
 
         # --------- Parameters ---------
         eps = MODEL.parameter("WassersteinRadius"); # -> radius with respect to 1-norm
+        alpha = MODEL.parameter("Alpha"); # -> Spread of the enhanced index
         rho = MODEL.parameter("Rho"); # -> radius with respect to 1-norm
         betaMod = MODEL.parameter("BetaMod"); # -> radius with respect to 1-norm
         a1_vec_param = MODEL.parameter("a1_vec_param"); # -> Penalty for CVaR
@@ -56,94 +58,292 @@ class ITMDRO(InvestmentStrategy):
         MODEL.constraint('budgetConstraint', Expr.sum(w), Domain.equalsTo(1.0));
 
         # Definition of affine functions (see derivation in thesis)
-        a_k = [Expr.mul(a1_vec_param, w), Expr.mul(a2_vec_param, w), w, Expr.mul(-1, w)];
-        b_k = [Expr.mul(nu, b1_vec_param), Expr.mul(nu, b2_vec_param), Expr.mul(nu, rho), Expr.mul(nu, rho)];
+        a_k, b_k = self.affineExpressions(MODEL);
+
+        # Portfolio returns of the scenarios, shared by the affine pieces
+        r = self.portfolioReturns(MODEL, w);
 
         # Constraints related to DRO
         for k in range(K):
 
             # Define basic operations for clarity
             bkVec = Expr.mul(b_k[k], np.ones(N));
-            portfolioTerm = Expr.mul(self.excessReturns, a_k[k]);
+            portfolioTerm = Expr.mul(a_k[k], r);
 
             # Add the constraints
             MODEL.constraint('maximumAffine_{}'.format(k), Expr.sub(Expr.add(bkVec, portfolioTerm), s), Domain.lessThan(0.0));
-            MODEL.constraint('infinityNormReturn1_{}'.format(k), Expr.sub(a_k[k], Expr.mul(mOnes, _lambda)), Domain.lessThan(0.0));
-            MODEL.constraint('infinityNormReturn2_{}'.format(k), Expr.sub(Expr.mul(-1, a_k[k]), Expr.mul(mOnes, _lambda)), Domain.lessThan(0.0));
+
+        # Infinity norm: with w >= 0 only the steepest piece a_1 = 1+rho/(1-beta) binds
+        MODEL.constraint('infinityNormReturn', Expr.sub(Expr.mul(a_k[0], w), Expr.mul(mOnes, _lambda)), Domain.lessThan(0.0));
+
+        return MODEL;
+
+    # Method: Affine functions a_k*(xi'w) + b_k*nu in terms of the variables and parameters of a built model (see derivation in thesis)
+    def affineExpressions(self, MODEL):
+
+        # Get variables and parameters
+        nu = MODEL.getVariable("nu");
+        rho = MODEL.getParameter("Rho");
+        a1_vec_param = MODEL.getParameter("a1_vec_param");
+        b1_vec_param = MODEL.getParameter("b1_vec_param");
+        a2_vec_param = MODEL.getParameter("a2_vec_param");
+        b2_vec_param = MODEL.getParameter("b2_vec_param");
+
+        # Definition of affine functions (slopes a_k multiply the portfolio return xi'w)
+        a_k = [a1_vec_param, a2_vec_param, 1.0, -1.0];
+        b_k = [Expr.mul(nu, b1_vec_param), Expr.mul(nu, b2_vec_param), Expr.mul(nu, rho), Expr.mul(nu, rho)];
+
+        return a_k, b_k;
+
+    # Method: Implement the model with MOSEK Fusion API
+    def solve(self, epsCollection=np.linspace(10**(-8), 10**(-1), 100), rhoCollection=np.array([2]),
+              betaCollection=np.array([0.95]), progressBar=True, detectLimit=True, limitTol=1e-6, warmStart=False, x0=None, alphaCollection=None,
+              optimizer=None):
+
+        # Reuse the model kept alive in rolling mode, otherwise build a new one
+        if self.rollingModel is not None:
+            self.useRollingWindow();
+            MODEL = self.rollingModel;
+        else:
+            MODEL = self.buildModel();
+
+        # --------- Constants ---------
+        N = self.excessReturns.shape[0]; # -> Number of scenarios
+        M = self.excessReturns.shape[1]; # -> Number of available assets to invest in
+
+        # --------- Parameters and variables of the built model ---------
+        eps = MODEL.getParameter("WassersteinRadius");
+        alpha = MODEL.getParameter("Alpha");
+        rho = MODEL.getParameter("Rho");
+        betaMod = MODEL.getParameter("BetaMod");
+        a1_vec_param = MODEL.getParameter("a1_vec_param");
+        b1_vec_param = MODEL.getParameter("b1_vec_param");
+        a2_vec_param = MODEL.getParameter("a2_vec_param");
+        b2_vec_param = MODEL.getParameter("b2_vec_param");
+        w = MODEL.getVariable("w");
+        _lambda = MODEL.getVariable("lambda");
+        nu = MODEL.getVariable("nu");
 
         # Record original objective
         recordedValues = ["obj", "eps", "gamma", "beta", "TE", "VaR", "CVaR"];
         columns = recordedValues + [i for i in range(1,M+1)];
         results = pd.DataFrame(columns=columns)
 
+        # Reuse the optimal basis between neighbouring grid points
+        self.iterations = [];
+        self.solveLog = [];
+        self.duals = [];
+        if warmStart:
+            self.warmStartSweep(MODEL);
+
+        # Start from a given point, e.g. the optimal portfolio of the previous rebalance window (simplex uses it by default)
+        if x0 is not None:
+            self.setInitialPoint(MODEL, x0, rhoCollection[0], betaCollection[0]);
+            optimizer = "primalSimplex" if optimizer is None else optimizer;
+
+        # A fixed optimizer, e.g. to compare iteration counts with and without initial point in the same unit
+        if optimizer is not None:
+            MODEL.setSolverParam("optimizer", optimizer);
+
+        # Sweep alpha on the same model (rows are ordered by alpha first), by default only the alpha of the data
+        alphaData = self.alpha;
+        if alphaCollection is None:
+            alphaCollection = np.array([alphaData]);
+
         # Solve optimization
-        with tqdm(total=len(epsCollection)*len(rhoCollection)*len(betaCollection), disable=not(progressBar)) as pbar:
-            for epsNext in epsCollection:
-                for rhoNew in rhoCollection:
-                    for betaNew in betaCollection:
-
-                        # Set parameter
-                        eps.setValue(epsNext);
-                        rho.setValue(rhoNew);
-                        betaMod.setValue(1/(1-betaNew));
-                        a1_vec_param.setValue(1+rhoNew/(1-betaNew));
-                        b1_vec_param.setValue(rhoNew-rhoNew/(1-betaNew));
-                        a2_vec_param.setValue(-1-rhoNew/(1-betaNew));
-                        b2_vec_param.setValue(rhoNew-rhoNew/(1-betaNew));
-
-                        # Solve model
-                        MODEL.solve();
-
-                        # Get problem status
-                        statusPrimal = MODEL.getPrimalSolutionStatus();
-                        statusDual = MODEL.getDualSolutionStatus();
-                        prosta = MODEL.getProblemStatus();
-
-                        # Check for optimality
-                        if statusPrimal == SolutionStatus.Optimal and statusDual == SolutionStatus.Optimal:
+        with tqdm(total=len(alphaCollection)*len(epsCollection)*len(rhoCollection)*len(betaCollection), disable=not(progressBar)) as pbar:
+            for alphaNext in alphaCollection:
 
-                            # Compute CVaR
-                            TE = np.dot(np.array(self.pi), np.abs(self.excessReturns.dot(w.level())));
-                            VaR = nu.level()[0]
-                            CVaR = VaR + 1/(1-betaNew)*np.mean(np.maximum(np.abs(self.excessReturns.dot(w.level())) - VaR, 0));
+                # Shift the excess returns of the data and the model by the new spread
+                self.setAlpha(alphaNext);
+                alpha.setValue(alphaNext);
 
-                            # Save row
-                            row = pd.DataFrame([MODEL.primalObjValue(), eps.getValue()[0], rho.getValue()[0], -1/betaMod.getValue()[0]+1, TE, VaR, CVaR] + list(w.level()), index=columns, columns=[0]);
+                # Large-radius limit: once the equally weighted portfolio is optimal, it stays optimal for all larger eps
+                epsLimit = self.limitingRadius();
+                limitReached = dict();
 
-                            # Concatenate with exisiting results
-                            results = pd.concat([results, row.T], axis=0);
+                for epsNext in epsCollection:
+                    for rhoNew in rhoCollection:
+                        for betaNew in betaCollection:
+
+                            # Fill grid points beyond the large-radius limit without solving
+                            if detectLimit and (rhoNew, betaNew) in limitReached and epsNext >= limitReached[(rhoNew, betaNew)][0]:
+
+                                # Objective grows linearly in eps with slope lambda
+                                epsReached, lambdaReached, rowReached = limitReached[(rhoNew, betaNew)];
+                                objNext = rowReached[0] + (epsNext - epsReached)*lambdaReached;
+
+                                # Save row
+                                row = pd.DataFrame([objNext, epsNext] + rowReached[2:], index=columns, columns=[0]);
+                                results = pd.concat([results, row.T], axis=0);
+
+                                pbar.update(1);
+                                continue;
+
+                            # Set parameter
+                            eps.setValue(epsNext);
+                            rho.setValue(rhoNew);
+                            betaMod.setValue(1/(1-betaNew));
+                            a1_vec_param.setValue(1+rhoNew/(1-betaNew));
+                            b1_vec_param.setValue(rhoNew-rhoNew/(1-betaNew));
+                            a2_vec_param.setValue(-1-rhoNew/(1-betaNew));
+                            b2_vec_param.setValue(rhoNew-rhoNew/(1-betaNew));
+
+                            # Solve model
+                            self.solveModel(MODEL, alpha=alphaNext, eps=epsNext, rho=rhoNew, beta=betaNew);
+                            self.iterations.append(self.iterationCount(MODEL));
+
+                            # Switch to the simplex optimizer to hot-start the next grid point
+                            if warmStart:
+                                MODEL.setSolverParam("optimizer", "primalSimplex");
+
+                            # Get problem status
+                            statusPrimal = MODEL.getPrimalSolutionStatus();
+                            statusDual = MODEL.getDualSolutionStatus();
+                            prosta = MODEL.getProblemStatus();
 
-                        else:
+                            # Check for optimality
+                            if statusPrimal == SolutionStatus.Optimal and statusDual == SolutionStatus.Optimal:
 
-                            print("Optimal solution could not be found for epsilon = {}.".format(epsNext));
-                            print(prosta, statusPrimal, statusDual);
+                                # Compute CVaR
+                                TE = np.dot(np.array(self.pi), np.abs(self.excessReturns.dot(w.level())));
+                                VaR = nu.level()[0]
+                                CVaR = VaR + 1/(1-betaNew)*np.dot(np.array(self.pi), np.maximum(np.abs(self.excessReturns.dot(w.level())) - VaR, 0));
+
+                                # Save row
+                                rowValues = [MODEL.primalObjValue(), eps.getValue()[0], rho.getValue()[0], -1/betaMod.getValue()[0]+1, TE, VaR, CVaR] + list(w.level());
+                                row = pd.DataFrame(rowValues, index=columns, columns=[0]);
+
+                                # Concatenate with exisiting results
+                                results = pd.concat([results, row.T], axis=0);
+
+                                # Duals for the reduced-cost check in solveScreened
+                                self.recordDuals(MODEL);
+
+                                # Record the limit if lambda attains its minimum c/M (see limitingRadius in InvestmentStrategy.py)
+                                lambdaMin = (1 + rhoNew/(1-betaNew))/M;
+                                if detectLimit and (epsNext >= epsLimit or _lambda.level()[0] <= lambdaMin*(1 + limitTol)):
+                                    if (rhoNew, betaNew) not in limitReached or epsNext < limitReached[(rhoNew, betaNew)][0]:
+                                        limitReached[(rhoNew, betaNew)] = (epsNext, _lambda.level()[0], rowValues);
+
+                            else:
+
+                                print("Optimal solution could not be found for epsilon = {}.".format(epsNext));
+                                print(prosta, statusPrimal, statusDual);
+
+                                # Compute CVaR
+                                TE = np.dot(np.array(self.pi), np.abs(self.excessReturns.dot(w.level())));
+                                VaR = nu.level()[0]
+                                CVaR = VaR + 1/(1-betaNew)*np.dot(np.array(self.pi), np.maximum(np.abs(self.excessReturns.dot(w.level())) - VaR, 0));
+                                print(CVaR)
+
+                                # Save row
+                                row = pd.DataFrame([MODEL.primalObjValue(), eps.getValue()[0], rho.getValue()[0], -1/betaMod.getValue()[0]+1, TE, VaR, CVaR] + list(w.level()), index=columns, columns=[0]);
+
+                                # Concatenate with exisiting results
+                                results = pd.concat([results, row.T], axis=0);
+
+                            pbar.update(1);
+
+        # Restore the spread of the data
+        self.setAlpha(alphaData);
+
+        # Set optimal portfolio
+        self.optimalPortfolio = results.iloc[0, :];
+        self.optimalPortfolio = self.optimalPortfolio.values[len(recordedValues):];
+        self.isOptimal = True;
+
+        # Get rid of model (unless it is kept alive in rolling mode)
+        if self.rollingModel is None:
+            MODEL.dispose();
+
+        # Set index
+        results.index = [i for i in range(0, len(results))];
+        results.attrs['solveLog'] = self.solveLogTable(); # -> One record per solve (see solveModel)
+        return results;
+
+    # Method: Solve the same grid with the NumPy first-order solver instead of MOSEK (see PDHG.py)
+    def solveFirstOrder(self, epsCollection=np.linspace(10**(-8), 10**(-1), 100), rhoCollection=np.array([2]),
+              betaCollection=np.array([0.95]), progressBar=True, tol=1e-5, maxIter=20000, x0=None, alphaCollection=None):
+
+        # --------- Constants ---------
+        M = self.excessReturns.shape[1]; # -> Number of available assets to invest in
+
+        # Record original objective
+        recordedValues = ["obj", "eps", "gamma", "beta", "TE", "VaR", "CVaR"];
+        columns = recordedValues + [i for i in range(1,M+1)];
+        results = pd.DataFrame(columns=columns)
+        self.iterations = [];
+        self.solveLog = [];
+
+        # Sweep alpha (rows are ordered by alpha first), by default only the alpha of the data
+        alphaData = self.alpha;
+        if alphaCollection is None:
+            alphaCollection = np.array([alphaData]);
+
+        # Solve optimization (each grid point starts from the solution of the previous one)
+        with tqdm(total=len(alphaCollection)*len(epsCollection)*len(rhoCollection)*len(betaCollection), disable=not(progressBar)) as pbar:
+            for alphaNext in alphaCollection:
+
+                # The scenarios change with alpha, so the solver is set up again
+                self.setAlpha(alphaNext);
+                solver = PDHG(self.excessReturns, self.pi, tol=tol, maxIter=maxIter);
+
+                for epsNext in epsCollection:
+                    for rhoNew in rhoCollection:
+                        for betaNew in betaCollection:
+
+                            # Set parameters
+                            a, b = self.affineCoefficients(rhoNew, betaNew);
+                            solver.setParameters(a, b, epsNext);
+                            if x0 is not None:
+                                solver.setInitialPoint(x0);
+
+                            # Solve model
+                            start = time.perf_counter();
+                            solution = solver.solve();
+                            self.iterations.append(solver.iterations);
+                            self.solveLog.append({'model': type(self).__name__, 'solver': 'PDHG', 'alpha': alphaNext, 'eps': epsNext, 'rho': rhoNew, 'beta': betaNew,
+                                                  'scenarios': self.excessReturns.shape[0], 'assets': M, 'buildTime': 0.0,
+                                                  'solveTime': time.perf_counter() - start, 'iterations': solver.iterations,
+                                                  'primalStatus': 'Converged' if solver.converged else 'NotConverged'});
+                            x0 = {'w': solution['w'], 'nu': solution['nu']};
+
+                            if not solver.converged:
+                                print("Tolerance not reached within {} iterations for epsilon = {}.".format(maxIter, epsNext));
 
                             # Compute CVaR
-                            TE = np.dot(np.array(self.pi), np.abs(self.excessReturns.dot(w.level())));
-                            VaR = nu.level()[0]
-                            CVaR = VaR + 1/(1-betaNew)*np.mean(np.maximum(np.abs(self.excessReturns.dot(w.level())) - VaR, 0));
-                            print(CVaR)
+                            w = solution['w'];
+                            TE = np.dot(np.array(self.pi), np.abs(self.excessReturns.dot(w)));
+                            VaR = solution['nu'];
+                            CVaR = VaR + 1/(1-betaNew)*np.dot(np.array(self.pi), np.maximum(np.abs(self.excessReturns.dot(w)) - VaR, 0));
 
                             # Save row
-                            row = pd.DataFrame([MODEL.primalObjValue(), eps.getValue()[0], rho.getValue()[0], -1/betaMod.getValue()[0]+1, TE, VaR, CVaR] + list(w.level()), index=columns, columns=[0]);
-
-                            # Concatenate with exisiting results
+                            row = pd.DataFrame([solution['obj'], epsNext, rhoNew, betaNew, TE, VaR, CVaR] + list(w), index=columns, columns=[0]);
                             results = pd.concat([results, row.T], axis=0);
 
-                        pbar.update(1);
+                            pbar.update(1);
+
+        # Restore the spread of the data
+        self.setAlpha(alphaData);
 
         # Set optimal portfolio
         self.optimalPortfolio = results.iloc[0, :];
         self.optimalPortfolio = self.optimalPortfolio.values[len(recordedValues):];
         self.isOptimal = True;
 
-        # Get rid of model
-        MODEL.dispose();
-
         # Set index
         results.index = [i for i in range(0, len(results))];
+        results.attrs['solveLog'] = self.solveLogTable(); # -> One record per solve (see solveModel)
         return results;
 
+    # Method: Coefficients of the affine pieces max_k a_k*(xi'w) + b_k*nu (see derivation in thesis)
+    def affineCoefficients(self, rho, beta):
+
+        a = np.array([1+rho/(1-beta), -1-rho/(1-beta), 1, -1]);
+        b = np.array([rho-rho/(1-beta), rho-rho/(1-beta), rho, rho]);
+        return a, b;
+
     def approximateObjective(self, returnsAssets, returnsIndex, w):
 
         # Processing of returns
@@ -1,6 +1,13 @@
 # Dependencies
+import time
+import json
+import inspect
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
+from scipy.spatial.distance import cdist
+from mosek.fusion import *
+from EITP.Auxiliaries.SolverTuning import getProfile, executionMode
 
 # Definition of parent class
 class InvestmentStrategy:
@@ -20,6 +27,7 @@ class InvestmentStrategy:
         self.returnsIndexEnhanced = returnsIndex + self.alpha
 
         # Define excess returns and probability weights
+        self.trackingReturns = (self.returnsAssets.T - self.returnsIndex).T
         self.excessReturns = (self.returnsAssets.T - self.returnsIndexEnhanced).T
         self.pi = None
         self.probabilityWeighting(weighting="EqualWeights")
@@ -28,6 +36,20 @@ class InvestmentStrategy:
         self.optimalPortfolio = None
         self.isOptimal = False
         self.results = None
+        self.iterations = []
+
+        # Rolling-window mode (see startRolling)
+        self.rollingModel = None
+
+        # Assets kept by presolve (None means the full universe)
+        self.presolveAssets = None
+
+        # MOSEK parameters of the built models (None means the tuned profile, see EITP/Auxiliaries/SolverTuning.py)
+        self.solverProfile = None
+
+        # One record per solve of the last call to solve() (see solveModel)
+        self.solveLog = []
+        self.buildStart = None
 
     # Getter functions
     def getOptimalPortfolio(self):
@@ -58,6 +80,9 @@ class InvestmentStrategy:
     # Method 1: Allow user to change data
     def setData(self, returnsAssets = np.zeros((0,0)), returnsIndex = np.zeros((0,0)), beta=0.95, rho=2, alpha=0.00):
 
+        # New data invalidates a model kept alive in rolling mode
+        self.stopRolling()
+
         # Modify index specificaitons
         self.alpha = alpha
         self.alphaAnnualy = (1 + alpha)**(252) - 1
@@ -72,20 +97,40 @@ class InvestmentStrategy:
 
         # Recalculate probability weights
         self.probabilityWeighting(weighting="EqualWeights")
+        self.presolveAssets = None
 
         # Define excess returns
+        self.trackingReturns = (self.returnsAssets.T - self.returnsIndex).T
         self.excessReturns = (self.returnsAssets.T - self.returnsIndexEnhanced).T
 
     # Method 2: Allow user to modify the weights on the scenarios
-    def probabilityWeighting(self, weighting="EqualWeights"):
+    def probabilityWeighting(self, weighting="EqualWeights", atoms=None, maxIter=100, seed=0):
 
         if weighting == "EqualWeights":
             self.pi = [1/self.N for i in range(self.N)];
+            self.reductionDistance = 0.0;
         elif weighting == "ExponentialDecay":
             self.pi = [1/self.N for i in range(self.N)];
+        elif weighting == "ScenarioReduction":
+            self.reduceScenarios(atoms, maxIter=maxIter, seed=seed);
         else:
             print("The specified type '{}' is unknown to the system. Please check the documentation.".format(weighting));
 
+    # Method 3: Limiting portfolio of the 1-norm Wasserstein DRO models as eps grows
+    def limitingPortfolio(self):
+
+        # With w >= 0 and sum(w) = 1, the eps * lambda term is minimized by the unique minimizer of ||w||_inf
+        return np.ones(self.M)/self.M;
+
+    # Method 4: Sufficient Wasserstein radius beyond which the limiting portfolio is optimal
+    def limitingRadius(self):
+
+        # Moving w away from 1/M by d increases lambda by at least c*max(d) and decreases the sample term
+        # by at most c*max|xi|*||d||_1 <= c*max|xi|*2(M-1)*max(d), where c = max_k |a_k| cancels out.
+        if self.N == 0 or self.M <= 1:
+            return 0.0;
+        return 2*(self.M - 1)*np.max(np.abs(self.excessReturns));
+
     # Method 5: Plot Out-of-Sample results (and save file)
     def testPortfolio(self, returnsAssets, returnsIndex, dataName="SP500", saveFile=None, plot=True, ylim=[90,110]):
 
@@ -148,4 +193,404 @@ class InvestmentStrategy:
         # Return the necessary data
         return selectedData, index, enhancedIndex, portfolio;
 
+    # Method 6: Let MOSEK reuse the previous optimal basis when sweeping parameters of a built model
+    def warmStartSweep(self, MODEL):
+
+        # The first solve uses interior-point with basis identification, later solves hot-start the simplex
+        MODEL.setSolverParam("intpntBasis", "always");
+        MODEL.setSolverParam("simHotstart", "statusKeys");
+
+    # Method 7: Total number of solver iterations spent in the last call to MODEL.solve()
+    def iterationCount(self, MODEL):
+
+        return (MODEL.getSolverIntInfo("intpntIter") + MODEL.getSolverIntInfo("simPrimalIter")
+                + MODEL.getSolverIntInfo("simDualIter"));
+
+    # Method 8: Map a portfolio onto a new universe when tickers enter or leave
+    def alignPortfolio(self, w, previousTickers, tickers):
+
+        # Entering tickers start at zero, leaving tickers are dropped and the rest is renormalized
+        weights = dict(zip(previousTickers, w));
+        aligned = np.array([weights.get(ticker, 0.0) for ticker in tickers], dtype=np.float64);
+
+        if np.sum(aligned) <= 0:
+            return np.ones(len(tickers))/len(tickers);
+        return aligned/np.sum(aligned);
+
+    # Method 9: Pass (w, nu) as an initial point to a built DRO model
+    def setInitialPoint(self, MODEL, x0, rho, beta):
+
+        # Complete the point so that it is feasible: lambda and s are implied by (w, nu)
+        a, b = self.affineCoefficients(rho, beta);
+        w = np.asarray(x0['w'], dtype=np.float64);
+        nu = float(x0['nu']);
+        r = self.excessReturns.dot(w);
+        s = np.max(np.outer(r, a) + b*nu, axis=1);
+
+        # Set levels (variable names are shared by the DRO models)
+        MODEL.getVariable("w").setLevel(w);
+        MODEL.getVariable("nu").setLevel([nu]);
+        MODEL.getVariable("lambda").setLevel([np.max(np.abs(a))*np.max(w)]);
+        MODEL.getVariable("s_i").setLevel(s);
+        MODEL.getVariable("r_i").setLevel(r);
+
+    # Method 10: Keep one built model alive and move its scenario window forward with advance()
+    def startRolling(self):
+
+        # Own copies of the window, since advance() overwrites rows in place
+        self.stopRolling();
+        if np.ptp(self.pi) > 0:
+            print("Rolling mode needs equally weighted scenarios. Call setData() to undo the scenario reduction first.");
+            return;
+        self.rollingAssets = np.array(self.returnsAssets, dtype=np.float64);
+        self.rollingIndex = np.array(self.returnsIndex, dtype=np.float64);
+        self.rollingTrackingReturns = np.array(self.trackingReturns, dtype=np.float64);
+        self.rollingHead = 0;
+
+        # Build the model once
+        self.useRollingWindow();
+        self.rollingModel = self.buildModel();
+
+    # Method 11: Replace the oldest scenarios of the rolling window with new observations
+    def advance(self, returnsAssets, returnsIndex):
+
+        # Only the newest N rows can be part of a window with N scenarios
+        N = self.rollingTrackingReturns.shape[0];
+        returnsAssets = np.atleast_2d(returnsAssets)[-N:,:];
+        returnsIndex = np.asarray(returnsIndex).reshape(-1)[-N:];
+        d = returnsAssets.shape[0];
+
+        # Equal weights make the order of the scenarios irrelevant, so the window is a ring buffer
+        rows = (self.rollingHead + np.arange(d)) % N;
+        self.rollingAssets[rows,:] = returnsAssets;
+        self.rollingIndex[rows] = returnsIndex;
+        self.rollingTrackingReturns[rows,:] = (returnsAssets.T - returnsIndex).T;
+        self.rollingHead = (self.rollingHead + d) % N;
+        self.useRollingWindow();
+
+        # Changed rows form at most two contiguous blocks
+        first = int(rows[0]);
+        blocks = [(first, min(first + d, N))];
+        if first + d > N:
+            blocks.append((0, first + d - N));
+
+        # Replace the affected rows of the portfolioReturns constraint (the rest of the model is kept)
+        w = self.rollingModel.getVariable("w");
+        r = self.rollingModel.getVariable("r_i");
+        for start, end in blocks:
+            constraint = self.rollingModel.getConstraint('portfolioReturns').slice(start, end);
+            constraint.update(Expr.sub(self.scenarioReturns(self.rollingModel, w, start, end), r.slice(start, end)));
+
+    # Method 12: Point the data attributes at the rolling window (approximateObjective overwrites them)
+    def useRollingWindow(self):
+
+        self.N, self.M = self.rollingTrackingReturns.shape;
+        self.returnsAssets = self.rollingAssets;
+        self.returnsIndex = self.rollingIndex;
+        self.returnsIndexEnhanced = self.rollingIndex + self.alpha;
+        self.trackingReturns = self.rollingTrackingReturns;
+        self.excessReturns = self.rollingTrackingReturns - self.alpha;
+
+    # Method 13: Leave rolling mode and dispose the model
+    def stopRolling(self):
+
+        if self.rollingModel is not None:
+            self.rollingModel.dispose();
+            self.rollingModel = None;
+
+    # Method 14: Change the enhanced-index spread alpha without touching the returns or a built model
+    def setAlpha(self, alpha):
 
+        self.alpha = alpha
+        self.alphaAnnualy = (1 + alpha)**(252) - 1
+        self.returnsIndexEnhanced = self.returnsIndex + self.alpha
+        self.excessReturns = self.trackingReturns - self.alpha
+
+    # Method 15: Scenario returns xi'x of a built model, with alpha entering through the "Alpha" parameter
+    def scenarioReturns(self, MODEL, x, start=0, end=None):
+
+        # Shifting every excess return by -alpha shifts xi'x by -alpha*sum(x)
+        scenarioMatrix = self.scenarioMatrix(start, end);
+        alphaTerm = Expr.mul(Expr.mul(MODEL.getParameter("Alpha"), Expr.sum(x)), np.ones(scenarioMatrix.numRows()));
+        return Expr.sub(Expr.mul(scenarioMatrix, x), alphaTerm);
+
+    # Method 16: Replace the scenarios by a few weighted atoms (k-medoids in the 1-norm of the Wasserstein ball)
+    def reduceScenarios(self, atoms, maxIter=100, seed=0):
+
+        # The atoms are observed scenarios, so assets, index and excess returns stay consistent (alpha cancels in distances)
+        scenarios = self.trackingReturns;
+        N = scenarios.shape[0];
+        pi = np.asarray(self.pi, dtype=np.float64);
+        if atoms is None or atoms >= N:
+            return;
+
+        # Initialize by sampling proportional to the distance to the closest medoid (k-means++)
+        rng = np.random.default_rng(seed);
+        medoids = [int(rng.integers(N))];
+        distance = cdist(scenarios, scenarios[medoids], 'cityblock')[:,0];
+        for j in range(1, atoms):
+            if np.sum(distance) <= 0:
+                break;
+            medoids.append(int(rng.choice(N, p=distance/np.sum(distance))));
+            distance = np.minimum(distance, cdist(scenarios, scenarios[medoids[-1:]], 'cityblock')[:,0]);
+        medoids = np.array(medoids);
+
+        # Alternate between assigning scenarios and moving each medoid to the member closest to the others
+        for iteration in range(maxIter):
+            labels = np.argmin(cdist(scenarios, scenarios[medoids], 'cityblock'), axis=1);
+            newMedoids = medoids.copy();
+            for j in range(len(medoids)):
+                members = np.flatnonzero(labels == j);
+                if len(members) > 0:
+                    within = cdist(scenarios[members], scenarios[members], 'cityblock').dot(pi[members]);
+                    newMedoids[j] = members[np.argmin(within)];
+            if np.array_equal(newMedoids, medoids):
+                break;
+            medoids = newMedoids;
+
+        # Weights are the probability mass of each cluster, the transport distance is the cost of moving it there
+        distances = cdist(scenarios, scenarios[medoids], 'cityblock');
+        labels = np.argmin(distances, axis=1);
+        weights = np.bincount(labels, weights=pi, minlength=len(medoids));
+        self.reductionDistance = float(np.dot(pi, distances[np.arange(N), labels]));
+
+        # Keep the atoms that received mass
+        keep = weights > 0;
+        medoids = medoids[keep];
+        self.scenarioAtoms = medoids;
+        self.N = len(medoids);
+        self.pi = list(weights[keep]);
+        self.returnsAssets = self.returnsAssets[medoids,:];
+        self.returnsIndex = np.asarray(self.returnsIndex).reshape(-1)[medoids];
+        self.returnsIndexEnhanced = self.returnsIndex + self.alpha;
+        self.trackingReturns = self.trackingReturns[medoids,:];
+        self.excessReturns = self.trackingReturns - self.alpha;
+
+    # Method 17: Radius around the reduced scenarios whose ball contains the ball of radius eps around the full data
+    def inflateRadius(self, epsCollection):
+
+        # W(Q, P_reduced) <= W(Q, P_full) + W(P_full, P_reduced) by the triangle inequality
+        return np.asarray(epsCollection) + self.reductionDistance;
+
+    # Method 18: Shrink the data before building a model and report the reduction
+    def presolve(self, dominatedAssets=False, epsCollection=None, verbose=True):
+
+        # Dropping dominated assets is only safe for the sample term. In the DRO models the worst-case term eps*lambda,
+        # lambda >= max|a_k|*max_j w_j, can grow when weight moves to the dominating asset, so there it needs eps = 0.
+        if dominatedAssets and hasattr(self, 'affineCoefficients') and (epsCollection is None or np.any(np.asarray(epsCollection) > 0)):
+            print("Dominated assets can only be removed from a DRO model that is solved for eps = 0 only. Pass epsCollection=[0] or dominatedAssets=False.");
+            return;
+
+        N, M = self.trackingReturns.shape;
+        pi = np.asarray(self.pi, dtype=np.float64);
+
+        # Identical scenarios give identical constraints, so they are merged into one with the summed weight
+        _, first, inverse = np.unique(self.trackingReturns, axis=0, return_index=True, return_inverse=True);
+        inverse = np.asarray(inverse).reshape(-1);
+        order = np.argsort(first); # -> Keep the scenarios in chronological order
+        rank = np.empty(len(first), dtype=int);
+        rank[order] = np.arange(len(first));
+        scenarios = first[order];
+        self.pi = list(np.bincount(rank[inverse], weights=pi));
+
+        # Assets returning less than another asset in every scenario (only for losses that are nonincreasing in the
+        # portfolio return, where moving weight to the dominating asset never increases the sample term)
+        assets = np.arange(M);
+        if dominatedAssets and hasattr(self, 'affineCoefficients') and np.all(self.affineCoefficients(self.rho, self.beta)[0] <= 0):
+            returns = self.trackingReturns[scenarios,:];
+            dominated = np.zeros(M, dtype=bool);
+            for j in range(M):
+                weaklyBelow = np.all(returns[:,[j]] <= returns, axis=0);
+                strictlyBelow = np.any(returns[:,[j]] < returns, axis=0);
+                weaklyBelow[j] = False;
+
+                # Duplicate assets dominate each other, the first of them is kept
+                dominated[j] = np.any(weaklyBelow & (strictlyBelow | (np.arange(M) < j)) & ~dominated);
+            assets = np.flatnonzero(~dominated);
+
+        # Restrict the data
+        self.selectData(scenarios, assets);
+        if self.presolveAssets is None:
+            self.presolveUniverse = M;
+        self.presolveAssets = assets if self.presolveAssets is None else self.presolveAssets[assets];
+
+        # Report the size reduction
+        if verbose:
+            print("Presolve: {} -> {} scenarios, {} -> {} assets.".format(N, self.N, M, self.M));
+        return {'scenarios': (N, self.N), 'assets': (M, self.M)};
+
+    # Method 19: Map a portfolio on the presolved assets back to the full universe (removed assets get zero weight)
+    def expandPortfolio(self, w):
+
+        if self.presolveAssets is None:
+            return np.asarray(w);
+        expanded = np.zeros(self.presolveUniverse);
+        expanded[self.presolveAssets] = np.asarray(w, dtype=np.float64);
+        return expanded;
+
+    # Method 20: Restrict the data to a subset of the scenarios and assets
+    def selectData(self, scenarios, assets):
+
+        self.N, self.M = len(scenarios), len(assets);
+        self.returnsAssets = np.atleast_2d(self.returnsAssets)[scenarios,:][:,assets];
+        self.returnsIndex = np.asarray(self.returnsIndex).reshape(-1)[scenarios];
+        self.returnsIndexEnhanced = self.returnsIndex + self.alpha;
+        self.trackingReturns = self.trackingReturns[scenarios,:][:,assets];
+        self.excessReturns = self.trackingReturns - self.alpha;
+
+    # Method 21: Keep the duals of the budget and portfolioReturns constraints of a solved DRO model
+    def recordDuals(self, MODEL):
+
+        budget = MODEL.getConstraint('budgetConstraint').dual()[0];
+        returns = MODEL.getConstraint('portfolioReturns').dual();
+        self.duals.append((budget, returns, self.alpha));
+
+    # Method 22: Reduced costs of the weights of all assets given the duals of a solve on a subset of them
+    def reducedCosts(self, duals, trackingReturns):
+
+        # w_j enters the budget with coefficient 1 and row i of portfolioReturns with xi_ij, while its
+        # infinity-norm row is slack at w_j = 0
+        budget, returns, alpha = duals;
+        excessReturns = trackingReturns - alpha;
+        return -(budget + excessReturns.T.dot(returns));
+
+    # Method 23: Solve on candidate assets and add assets with negative reduced cost until the full problem is optimal
+    def solveScreened(self, candidates=None, size=50, batch=10, tol=1e-9, maxRounds=20, **solveArguments):
+
+        # Screening needs the duals of an LP on data that can be restricted
+        if getattr(self, 'cardinality', False) or self.rollingModel is not None:
+            print("Screening is not available under cardinality constraints or in rolling mode.");
+            return self.solve(**solveArguments);
+
+        # Keep the full data
+        N, M = self.N, self.M;
+        returnsAssets, returnsIndex, trackingReturns = self.returnsAssets, self.returnsIndex, self.trackingReturns;
+
+        # By default start from the assets most correlated with the index
+        if candidates is None:
+            assetsCentered = np.atleast_2d(returnsAssets) - np.mean(returnsAssets, axis=0);
+            indexCentered = np.asarray(returnsIndex).reshape(-1) - np.mean(returnsIndex);
+            correlation = assetsCentered.T.dot(indexCentered)/(np.linalg.norm(assetsCentered, axis=0)*np.linalg.norm(indexCentered) + 1e-12);
+            candidates = np.argsort(-correlation)[:size];
+        active = np.unique(candidates);
+
+        # Grid points beyond the large-radius limit are filled in without a solve and would have no duals
+        if 'detectLimit' in inspect.signature(self.solve).parameters:
+            solveArguments['detectLimit'] = False;
+
+        self.certified = False;
+        solveLog = [];
+        for iteration in range(maxRounds):
+
+            # Solve the grid on the active assets
+            self.returnsAssets, self.returnsIndex, self.trackingReturns = returnsAssets, returnsIndex, trackingReturns;
+            self.selectData(np.arange(N), active);
+            results = self.solve(**solveArguments);
+            solveLog += self.solveLog;
+
+            # Every grid point must be optimal, then the most negative reduced cost over the grid decides
+            if len(self.duals) != len(results):
+                print("Not all grid points were solved to optimality, so the screening cannot be certified.");
+                break;
+            reduced = np.full(M, np.inf);
+            for duals in self.duals:
+                reduced = np.minimum(reduced, self.reducedCosts(duals, trackingReturns));
+            reduced[active] = np.inf;
+            violating = np.flatnonzero(reduced < -tol);
+            print("Screening round {}: {} active assets, {} with negative reduced cost.".format(iteration + 1, len(active), len(violating)));
+
+            if len(violating) == 0:
+                self.certified = True;
+                break;
+            active = np.union1d(active, violating[np.argsort(reduced[violating])][:batch]);
+
+        # Restore the full data
+        self.N, self.M = N, M;
+        self.returnsAssets, self.returnsIndex, self.trackingReturns = returnsAssets, returnsIndex, trackingReturns;
+        self.returnsIndexEnhanced = self.returnsIndex + self.alpha;
+        self.excessReturns = self.trackingReturns - self.alpha;
+        self.screenedAssets = active;
+        self.solveLog = solveLog;
+
+        # Weights of the assets outside the active set are zero
+        recorded = results.shape[1] - len(active);
+        expanded = pd.DataFrame(np.zeros((len(results), recorded + M)), columns=list(results.columns[:recorded]) + [i for i in range(1,M+1)]);
+        expanded.iloc[:, :recorded] = results.iloc[:, :recorded].values;
+        expanded.iloc[:, recorded + active] = results.iloc[:, recorded:].values;
+        self.optimalPortfolio = expanded.iloc[0, recorded:].values;
+        expanded.attrs['solveLog'] = self.solveLogTable(); # -> Solves of all rounds
+        return expanded;
+
+    # Method 24: Scenario matrix of the tracking returns as a Fusion matrix (sparse if most entries are zero)
+    def scenarioMatrix(self, start=0, end=None):
+
+        trackingReturns = np.ascontiguousarray(self.trackingReturns[start:end,:], dtype=np.float64);
+        if np.count_nonzero(trackingReturns) < 0.5*trackingReturns.size:
+            return Matrix.sparse(trackingReturns);
+        return Matrix.dense(trackingReturns);
+
+    # Method 25: Portfolio returns r_i = xi_i'w of a built model, so the scenario matrix enters the model only once
+    def portfolioReturns(self, MODEL, w):
+
+        # The K affine pieces are scalings of r, i.e. N*M + K*N nonzeros instead of K*N*M
+        r = MODEL.variable("r_i", self.trackingReturns.shape[0], Domain.unbounded());
+        MODEL.constraint('portfolioReturns', Expr.sub(self.scenarioReturns(MODEL, w), r), Domain.equalsTo(0.0));
+        return r;
+
+    # Method 26: Set the MOSEK parameters of the tuned profile for this model class and execution mode
+    def applySolverProfile(self, MODEL):
+
+        # Without a tuned profile MOSEK keeps its defaults
+        if self.solverProfile is not None:
+            profile = self.solverProfile;
+        else:
+            profile = getProfile([cls.__name__ for cls in type(self).__mro__], executionMode());
+
+        for name, value in profile.items():
+            MODEL.setSolverParam(name, value);
+
+    # Method 27: Create a Fusion model with the tuned solver profile and start the clock of its build
+    def createModel(self, name):
+
+        MODEL = Model(name);
+        self.applySolverProfile(MODEL);
+        self.buildStart = time.perf_counter();
+        return MODEL;
+
+    # Method 28: Solve a built model and record timings, iterations, presolve reductions, statuses and problem size
+    def solveModel(self, MODEL, **gridPoint):
+
+        start = time.perf_counter();
+        MODEL.solve();
+        solveTime = time.perf_counter() - start;
+
+        # The build time (from createModel to the first solve) is charged to the first solve of a model
+        buildTime = 0.0 if self.buildStart is None else start - self.buildStart;
+        self.buildStart = None;
+
+        task = MODEL.getTask();
+        record = {'model': type(self).__name__, 'solver': 'MOSEK', **gridPoint,
+                  'scenarios': self.excessReturns.shape[0], 'assets': self.excessReturns.shape[1],
+                  'buildTime': buildTime, 'solveTime': solveTime,
+                  'optimizerTime': MODEL.getSolverDoubleInfo("optimizerTime"),
+                  'presolveTime': MODEL.getSolverDoubleInfo("presolveTime"),
+                  'iterations': self.iterationCount(MODEL),
+                  'constraints': task.getnumcon(), 'variables': task.getnumvar(), 'nonzeros': task.getnumanz(),
+                  'constraintsPresolved': MODEL.getSolverIntInfo("optNumcon"),
+                  'variablesPresolved': MODEL.getSolverIntInfo("optNumvar"),
+                  'problemStatus': str(MODEL.getProblemStatus()),
+                  'primalStatus': str(MODEL.getPrimalSolutionStatus()),
+                  'dualStatus': str(MODEL.getDualSolutionStatus())};
+        self.solveLog.append(record);
+
+    # Method 29: Solve log of the last call to solve() as a table
+    def solveLogTable(self):
+
+        return pd.DataFrame(self.solveLog);
+
+    # Method 30: Append the solve log to a JSONL file (one record per line)
+    def writeSolveLog(self, path):
+
+        with open(path, 'a') as file:
+            for record in self.solveLog:
+                file.write(json.dumps(record, default=float) + "\n");
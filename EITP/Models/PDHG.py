@@ -0,0 +1,170 @@
+import numpy as np
+
+class PDHG:
+
+    def __init__(self, scenarios=np.zeros((0,0)), pi=None, tol=1e-5, maxIter=20000, checkFrequency=64, primalWeight=0.1):
+
+        # Scenario matrix (only products with it and its transpose are used) and probabilities
+        self.scenarios = scenarios;
+        self.N, self.M = scenarios.shape;
+        self.pi = np.ones(self.N)/self.N if pi is None else np.asarray(pi, dtype=np.float64);
+
+        # Settings
+        self.tol = tol; # -> Tolerance on the fixed-point residual relative to that of the equally weighted start
+        self.maxIter = maxIter;
+        self.checkFrequency = checkFrequency; # -> Iterations between restart checks
+        self.primalWeight = primalWeight; # -> Ratio of the primal to the dual step sizes
+
+        # Row and column sums of |xi| for the diagonal preconditioning (computed once)
+        absScenarios = np.abs(scenarios);
+        self.rowSums = absScenarios.sum(axis=1);
+        self.columnSums = self.pi.dot(absScenarios);
+        del absScenarios
+
+        # Scale of nu relative to the weights (the coefficients b_k are much larger than a_k*xi)
+        self.nuScale = max(np.mean(self.rowSums)/max(self.M, 1), 1e-12);
+
+        # Current iterate (primal w, nu and dual Q per scenario and affine piece, p for the infinity norm)
+        self.iterate = None;
+        self.iterations = 0;
+
+    # Method 1: Parameters of the piecewise affine loss max_k a_k*(xi'w) + b_k*nu and the Wasserstein radius
+    def setParameters(self, a, b, eps):
+
+        self.a = np.asarray(a, dtype=np.float64);
+        self.b = np.asarray(b, dtype=np.float64);
+        self.eps = eps;
+        self.c = np.max(np.abs(self.a)); # -> lambda = c*max(w) at the optimum
+
+        # Diagonal step sizes (Pock and Chambolle, 2011), nu is solved for in units of nuScale
+        bScaled = self.nuScale*self.b;
+        self.tauW = 1/(np.sum(np.abs(self.a))*self.columnSums + eps*self.c + 1e-12);
+        # Without a nu term in the loss (b = 0, e.g. rho = 0) nu is held fixed
+        self.tauNu = 1/np.sum(np.abs(bScaled)) if np.any(bScaled != 0) else 0.0;
+        self.sigmaQ = 1/(self.pi[:,None]*(np.outer(self.rowSums, np.abs(self.a)) + np.abs(bScaled)[None,:]) + 1e-12);
+        self.sigmaP = 1/(eps*self.c) if eps > 0 else 0.0;
+
+        # Dual of a new number of pieces cannot be reused
+        if self.iterate is not None and self.iterate[2].shape[1] != len(self.a):
+            self.iterate = None;
+
+        # Residual of the cold start, the tolerance is relative to it
+        coldStart = self.coldStart();
+        self.referenceResidual = self.residual(coldStart, self.step(coldStart, self.primalWeight), self.primalWeight);
+
+    # Method 2: Equally weighted portfolio and uniform dual weights
+    def coldStart(self):
+
+        K = len(self.a);
+        return (np.ones(self.M)/self.M, 0.0, np.ones((self.N, K))/K, np.ones(self.M)/self.M);
+
+    # Method 3: Start from a given portfolio (and VaR), e.g. the solution of the previous rebalance window
+    def setInitialPoint(self, x0):
+
+        coldStart = self.coldStart();
+        w = self.projectSimplex(np.asarray(x0['w'], dtype=np.float64)[None,:], np.ones((1, self.M)))[0];
+        nu = float(x0.get('nu', 0.0))/self.nuScale;
+        Q = coldStart[2] if self.iterate is None else self.iterate[2];
+        p = coldStart[3] if self.iterate is None else self.iterate[3];
+        self.iterate = (w, nu, Q, p);
+
+    # Method 4: Projection of the rows of V onto the simplex in the metric diag(1/S)
+    def projectSimplex(self, V, S):
+
+        # The solution is max(v - s*theta, 0), where the active set is found from the sorted breakpoints v/s
+        order = np.argsort(-V/S, axis=1);
+        sortedV = np.take_along_axis(V, order, axis=1);
+        sortedS = np.take_along_axis(S, order, axis=1);
+        theta = (np.cumsum(sortedV, axis=1) - 1)/np.cumsum(sortedS, axis=1);
+        active = sortedV - sortedS*theta > 0;
+        last = V.shape[1] - 1 - np.argmax(active[:, ::-1], axis=1);
+        return np.maximum(V - S*theta[np.arange(V.shape[0]), last][:,None], 0);
+
+    # Method 5: One iteration of the primal-dual hybrid gradient method
+    def step(self, iterate, omega):
+
+        w, nu, Q, p = iterate;
+
+        # Primal step on (w, nu) with the adjoint of the scenario operator
+        gradientW = self.scenarios.T.dot(self.pi*Q.dot(self.a)) + self.eps*self.c*p;
+        gradientNu = self.nuScale*self.pi.dot(Q.dot(self.b));
+        tauW = omega*self.tauW;
+        wNext = self.projectSimplex((w - tauW*gradientW)[None,:], tauW[None,:])[0];
+        nuNext = nu - omega*self.tauNu*gradientNu;
+
+        # Dual step at the extrapolated point
+        wBar = 2*wNext - w;
+        nuBar = 2*nuNext - nu;
+        returnsBar = self.scenarios.dot(wBar);
+        sigmaQ = self.sigmaQ/omega;
+        QNext = self.projectSimplex(Q + sigmaQ*(self.pi[:,None]*(np.outer(returnsBar, self.a) + self.nuScale*nuBar*self.b)), sigmaQ);
+        if self.eps > 0:
+            sigmaP = np.full((1, self.M), self.sigmaP/omega);
+            pNext = self.projectSimplex(p[None,:] + sigmaP*self.eps*self.c*wBar[None,:], sigmaP)[0];
+        else:
+            pNext = p;
+
+        return (wNext, nuNext, QNext, pNext);
+
+    # Method 6: Fixed-point residual of a step in the norm of the step sizes (zero exactly at saddle points)
+    def residual(self, iterate, iterateNext, omega):
+
+        primal = np.sum((iterateNext[0] - iterate[0])**2/(omega*self.tauW));
+        if self.tauNu > 0:
+            primal += (iterateNext[1] - iterate[1])**2/(omega*self.tauNu);
+        dual = np.sum((iterateNext[2] - iterate[2])**2*omega/self.sigmaQ);
+        if self.eps > 0:
+            dual += np.sum((iterateNext[3] - iterate[3])**2)*omega/self.sigmaP;
+        return np.sqrt(primal + dual);
+
+    # Method 7: Solve from the current iterate with adaptive restarts to the average (warm start between calls)
+    def solve(self):
+
+        if self.iterate is None:
+            self.iterate = self.coldStart();
+
+        omega = self.primalWeight;
+        iterate = self.iterate;
+        average = iterate;
+        restartResidual = self.residual(iterate, self.step(iterate, omega), omega);
+        previousResidual = np.inf;
+        count = 0;
+        self.converged = False;
+
+        for k in range(1, self.maxIter + 1):
+
+            # Iterate and average since the last restart
+            iterate = self.step(iterate, omega);
+            count += 1;
+            average = tuple(m + (x - m)/count for m, x in zip(average, iterate));
+
+            if k % self.checkFrequency != 0:
+                continue;
+
+            # Restart from the better of the current and the average iterate when the residual has decayed enough
+            currentResidual = self.residual(iterate, self.step(iterate, omega), omega);
+            averageResidual = self.residual(average, self.step(average, omega), omega);
+            candidate, candidateResidual = (average, averageResidual) if averageResidual < currentResidual else (iterate, currentResidual);
+            if candidateResidual < 0.2*restartResidual or (candidateResidual < 0.8*restartResidual and candidateResidual > previousResidual):
+                iterate, average, restartResidual, count = candidate, candidate, candidateResidual, 0;
+
+            # Stop once the residual has decayed below the tolerance
+            if candidateResidual <= self.tol*self.referenceResidual:
+                iterate = candidate;
+                self.converged = True;
+                break;
+
+            previousResidual = candidateResidual;
+
+        self.iterate = iterate;
+        self.iterations = k;
+        return self.solution();
+
+    # Method 8: Primal solution with lambda, s and the objective implied by (w, nu)
+    def solution(self):
+
+        w, nu, Q, p = self.iterate;
+        nu = self.nuScale*nu;
+        s = np.max(np.outer(self.scenarios.dot(w), self.a) + nu*self.b, axis=1);
+        _lambda = self.c*np.max(w);
+        return {'w': w, 'nu': nu, 'lambda': _lambda, 's': s, 'obj': self.eps*_lambda + self.pi.dot(s)};
@@ -13,11 +13,10 @@ class RAERMDRO(InvestmentStrategy):
         # Call constructor from parent class (see InvestmentStrategy.py)
         super().__init__(returnsAssets=returnsAssets, returnsIndex=returnsIndex, beta=beta, rho=rho, alpha=alpha)
 
-    # Method: Solve model with MOSEK Fusion API
-    def solve(self, epsCollection=np.linspace(10**(-8), 10**(-1), 100), rhoCollection=np.array([2]),
-              betaCollection=np.array([0.95]), progressBar=True):
+    # Method: Build the model with MOSEK Fusion API
+    def buildModel(self):
 
-        MODEL = Model("ExcessCVaRModelDRO");
+        MODEL = self.createModel("ExcessCVaRModelDRO");
 
         # --------- Constants ---------
         delta = 0; # -> Shorting limit
@@ -27,6 +26,7 @@ class RAERMDRO(InvestmentStrategy):
 
         # --------- Parameters ---------
         eps = MODEL.parameter("WassersteinRadius"); # -> radius with respect to 1-norm
+        alpha = MODEL.parameter("Alpha"); # -> Spread of the enhanced index
         betaMod = MODEL.parameter("BetaMod"); # -> Quantile for Expected Shortfall
         rho = MODEL.parameter("Rho"); # -> Penalty for CVaR
         a1_vec_param = MODEL.parameter("a1_vec_param"); # -> Penalty for CVaR
@@ -51,79 +51,198 @@ class RAERMDRO(InvestmentStrategy):
         MODEL.constraint('budgetConstraint', Expr.sum(w), Domain.equalsTo(1.0));
 
         # Definition of affine functions (see derivation in thesis)
-        a_k = [Expr.mul(a1_vec_param, w), Expr.neg(w)];
-        b_k = [Expr.mul(nu, b1_vec_param), Expr.mul(nu, rho)];
+        a_k, b_k = self.affineExpressions(MODEL);
+
+        # Portfolio returns of the scenarios, shared by the affine pieces
+        r = self.portfolioReturns(MODEL, w);
 
         # Constraints related to DRO
         for k in range(K):
 
             # Define basic operations for clarity
             bkVec = Expr.mul(b_k[k], np.ones(N));
-            portfolioTerm = Expr.mul(self.excessReturns, a_k[k]);
+            portfolioTerm = Expr.mul(a_k[k], r);
 
             # Add the constraints
             MODEL.constraint('maximumAffine_{}'.format(k), Expr.sub(Expr.add(bkVec, portfolioTerm), s), Domain.lessThan(0.0));
-            MODEL.constraint('infinityNormReturn1_{}'.format(k), Expr.sub(a_k[k], Expr.mul(mOnes, _lambda)), Domain.lessThan(0.0));
-            MODEL.constraint('infinityNormReturn2_{}'.format(k), Expr.sub(Expr.mul(-1, a_k[k]), Expr.mul(mOnes, _lambda)), Domain.lessThan(0.0));
+
+        # Infinity norm: with w >= 0 only the steepest piece a_1 = -1-rho/(1-beta) binds
+        MODEL.constraint('infinityNormReturn', Expr.sub(Expr.mul(-1, Expr.mul(a_k[0], w)), Expr.mul(mOnes, _lambda)), Domain.lessThan(0.0));
+
+        return MODEL;
+
+    # Method: Affine functions a_k*(xi'w) + b_k*nu in terms of the variables and parameters of a built model (see derivation in thesis)
+    def affineExpressions(self, MODEL):
+
+        # Get variables and parameters
+        nu = MODEL.getVariable("nu");
+        rho = MODEL.getParameter("Rho");
+        a1_vec_param = MODEL.getParameter("a1_vec_param");
+        b1_vec_param = MODEL.getParameter("b1_vec_param");
+
+        # Definition of affine functions (slopes a_k multiply the portfolio return xi'w)
+        a_k = [a1_vec_param, -1.0];
+        b_k = [Expr.mul(nu, b1_vec_param), Expr.mul(nu, rho)];
+
+        return a_k, b_k;
+
+    # Method: Solve model with MOSEK Fusion API
+    def solve(self, epsCollection=np.linspace(10**(-8), 10**(-1), 100), rhoCollection=np.array([2]),
+              betaCollection=np.array([0.95]), progressBar=True, detectLimit=True, limitTol=1e-6, warmStart=False, x0=None, alphaCollection=None,
+              optimizer=None):
+
+        # Reuse the model kept alive in rolling mode, otherwise build a new one
+        if self.rollingModel is not None:
+            self.useRollingWindow();
+            MODEL = self.rollingModel;
+        else:
+            MODEL = self.buildModel();
+
+        # --------- Constants ---------
+        N = self.excessReturns.shape[0]; # -> Number of scenarios
+        M = self.excessReturns.shape[1]; # -> Number of available assets to invest in
+
+        # --------- Parameters and variables of the built model ---------
+        eps = MODEL.getParameter("WassersteinRadius");
+        alpha = MODEL.getParameter("Alpha");
+        betaMod = MODEL.getParameter("BetaMod");
+        rho = MODEL.getParameter("Rho");
+        a1_vec_param = MODEL.getParameter("a1_vec_param");
+        b1_vec_param = MODEL.getParameter("b1_vec_param");
+        w = MODEL.getVariable("w");
+        _lambda = MODEL.getVariable("lambda");
+        nu = MODEL.getVariable("nu");
 
         # Record original objective
         recordedValues = ["obj", "eps", "rho", "beta", "excessReturns", "VaR", "CVaR"];
         columns = recordedValues + [i for i in range(1,M+1)];
         results = pd.DataFrame(columns=columns)
 
+        # Reuse the optimal basis between neighbouring grid points
+        self.iterations = [];
+        self.solveLog = [];
+        self.duals = [];
+        if warmStart:
+            self.warmStartSweep(MODEL);
+
+        # Start from a given point, e.g. the optimal portfolio of the previous rebalance window (simplex uses it by default)
+        if x0 is not None:
+            self.setInitialPoint(MODEL, x0, rhoCollection[0], betaCollection[0]);
+            optimizer = "primalSimplex" if optimizer is None else optimizer;
+
+        # A fixed optimizer, e.g. to compare iteration counts with and without initial point in the same unit
+        if optimizer is not None:
+            MODEL.setSolverParam("optimizer", optimizer);
+
+        # Sweep alpha on the same model (rows are ordered by alpha first), by default only the alpha of the data
+        alphaData = self.alpha;
+        if alphaCollection is None:
+            alphaCollection = np.array([alphaData]);
+
         # Solve optimization
-        with tqdm(total=len(epsCollection)*len(rhoCollection)*len(betaCollection), disable=not(progressBar)) as pbar:
-            for epsNext in epsCollection:
-                for rhoNew in rhoCollection:
-                    for betaNew in betaCollection:
+        with tqdm(total=len(alphaCollection)*len(epsCollection)*len(rhoCollection)*len(betaCollection), disable=not(progressBar)) as pbar:
+            for alphaNext in alphaCollection:
+
+                # Shift the excess returns of the data and the model by the new spread
+                self.setAlpha(alphaNext);
+                alpha.setValue(alphaNext);
+
+                # Large-radius limit: once the equally weighted portfolio is optimal, it stays optimal for all larger eps
+                epsLimit = self.limitingRadius();
+                limitReached = dict();
+
+                for epsNext in epsCollection:
+                    for rhoNew in rhoCollection:
+                        for betaNew in betaCollection:
+
+                            # Fill grid points beyond the large-radius limit without solving
+                            if detectLimit and (rhoNew, betaNew) in limitReached and epsNext >= limitReached[(rhoNew, betaNew)][0]:
 
-                        # Set parameters
-                        eps.setValue(epsNext);
-                        rho.setValue(rhoNew);
-                        betaMod.setValue(1/(1-betaNew));
-                        a1_vec_param.setValue(-1-rhoNew/(1-betaNew));
-                        b1_vec_param.setValue(rhoNew - rhoNew/(1-betaNew));
+                                # Objective grows linearly in eps with slope lambda
+                                epsReached, lambdaReached, rowReached = limitReached[(rhoNew, betaNew)];
+                                objNext = rowReached[0] + (epsNext - epsReached)*lambdaReached;
 
-                        # Solve model
-                        MODEL.solve();
+                                # Save row
+                                row = pd.DataFrame([objNext, epsNext] + rowReached[2:], index=columns, columns=[0]);
+                                results = pd.concat([results, row.T], axis=0);
 
-                        # Get problem status
-                        statusPrimal = MODEL.getPrimalSolutionStatus();
-                        statusDual = MODEL.getDualSolutionStatus();
-                        prosta = MODEL.getProblemStatus();
+                                pbar.update(1);
+                                continue;
 
-                        # Check for optimality
-                        if statusPrimal == SolutionStatus.Optimal and statusDual == SolutionStatus.Optimal:
+                            # Set parameters
+                            eps.setValue(epsNext);
+                            rho.setValue(rhoNew);
+                            betaMod.setValue(1/(1-betaNew));
+                            a1_vec_param.setValue(-1-rhoNew/(1-betaNew));
+                            b1_vec_param.setValue(rhoNew - rhoNew/(1-betaNew));
 
-                            # Compute CVaR
-                            excessReturns = np.dot(np.array(self.pi), self.excessReturns.dot(w.level()));
-                            VaR = nu.level()[0]
-                            CVaR = VaR + 1/(1-betaNew)*np.mean(np.maximum(-self.excessReturns.dot(w.level()) - VaR, 0));
+                            # Solve model
+                            self.solveModel(MODEL, alpha=alphaNext, eps=epsNext, rho=rhoNew, beta=betaNew);
+                            self.iterations.append(self.iterationCount(MODEL));
 
-                            # Save row
-                            row = pd.DataFrame([MODEL.primalObjValue(), eps.getValue()[0], rho.getValue()[0], -1/betaMod.getValue()[0]+1, excessReturns, VaR, CVaR] + list(w.level()), index=columns, columns=[0]);
+                            # Switch to the simplex optimizer to hot-start the next grid point
+                            if warmStart:
+                                MODEL.setSolverParam("optimizer", "primalSimplex");
 
-                            # Concatenate with exisiting results
-                            results = pd.concat([results, row.T], axis=0);
+                            # Get problem status
+                            statusPrimal = MODEL.getPrimalSolutionStatus();
+                            statusDual = MODEL.getDualSolutionStatus();
+                            prosta = MODEL.getProblemStatus();
 
-                        else:
-                            print("Solution could not be found for epsilon = {}.".format(epsNext));
-                            print(prosta);
+                            # Check for optimality
+                            if statusPrimal == SolutionStatus.Optimal and statusDual == SolutionStatus.Optimal:
 
-                        pbar.update(1);
+                                # Compute CVaR
+                                excessReturns = np.dot(np.array(self.pi), self.excessReturns.dot(w.level()));
+                                VaR = nu.level()[0]
+                                CVaR = VaR + 1/(1-betaNew)*np.dot(np.array(self.pi), np.maximum(-self.excessReturns.dot(w.level()) - VaR, 0));
+
+                                # Save row
+                                rowValues = [MODEL.primalObjValue(), eps.getValue()[0], rho.getValue()[0], -1/betaMod.getValue()[0]+1, excessReturns, VaR, CVaR] + list(w.level());
+                                row = pd.DataFrame(rowValues, index=columns, columns=[0]);
+
+                                # Concatenate with exisiting results
+                                results = pd.concat([results, row.T], axis=0);
+
+                                # Duals for the reduced-cost check in solveScreened
+                                self.recordDuals(MODEL);
+
+                                # Record the limit if lambda attains its minimum c/M (see limitingRadius in InvestmentStrategy.py)
+                                lambdaMin = (1 + rhoNew/(1-betaNew))/M;
+                                if detectLimit and (epsNext >= epsLimit or _lambda.level()[0] <= lambdaMin*(1 + limitTol)):
+                                    if (rhoNew, betaNew) not in limitReached or epsNext < limitReached[(rhoNew, betaNew)][0]:
+                                        limitReached[(rhoNew, betaNew)] = (epsNext, _lambda.level()[0], rowValues);
+
+                            else:
+                                print("Solution could not be found for epsilon = {}.".format(epsNext));
+                                print(prosta);
+
+                            pbar.update(1);
+
+        # Restore the spread of the data
+        self.setAlpha(alphaData);
 
         # Set optimal portfolio
         self.optimalPortfolio = results.iloc[0, :];
         self.optimalPortfolio = self.optimalPortfolio.values[len(recordedValues):];
         self.isOptimal = True;
 
-        # Get rid of model
-        MODEL.dispose()
+        # Get rid of model (unless it is kept alive in rolling mode)
+        if self.rollingModel is None:
+            MODEL.dispose();
 
         # Set index
         results.index = [i for i in range(0, len(results))];
+        results.attrs['solveLog'] = self.solveLogTable(); # -> One record per solve (see solveModel)
         return results;
 
+    # Method: Coefficients of the affine pieces max_k a_k*(xi'w) + b_k*nu (see derivation in thesis)
+    def affineCoefficients(self, rho, beta):
+
+        a = np.array([-1-rho/(1-beta), -1]);
+        b = np.array([rho-rho/(1-beta), rho]);
+        return a, b;
+
     def approximateObjective(self, returnsAssets, returnsIndex, w, rho=2, manualRho=False):
 
         # If manual rho, set it
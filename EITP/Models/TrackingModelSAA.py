@@ -22,18 +22,23 @@ class TrackingModelSAA(InvestmentStrategy):
         super().__init__(returnsAssets=returnsAssets, returnsIndex=returnsIndex, beta=beta, rho=rho, alpha=alpha)
 
     # Method 1: Run model
-    def solve(self, x0=None):
+    def solve(self, rhoCollection=None, betaCollection=None, progressBar=False, alphaCollection=None, x0=None):
 
         # Initialize model with MOSEK
-        MODEL = Model("TrackingModelSAA");
+        MODEL = self.createModel("TrackingModelSAA");
 
         # Get dimensions
         M = self.excessReturns.shape[0]; # -> Number of scenarios
         N = self.excessReturns.shape[1]; # -> Number of available assets to invest in
 
-        # Get parameters
-        beta = self.beta;
-        rho = self.rho;
+        # Get parameters (the grid defaults to the rho and beta of the model)
+        if rhoCollection is None:
+            rhoCollection = np.array([self.rho]);
+        if betaCollection is None:
+            betaCollection = np.array([self.beta]);
+        betaMod = MODEL.parameter("BetaMod"); # -> Quantile for Expected Shortfall
+        rho = MODEL.parameter("Rho"); # -> Penalty for CVaR
+        alpha = MODEL.parameter("Alpha"); # -> Spread of the enhanced index
 
         # Decision variable (fraction of holdings in each security)
         w = MODEL.variable("w", N, Domain.greaterThan(0.0))
@@ -47,48 +52,87 @@ class TrackingModelSAA(InvestmentStrategy):
 
         # Objective
         expectedDeviation = Expr.dot(y, self.pi);
-        expectedCVaR = Expr.add(nu, Expr.mul(1/(1 - beta), Expr.dot(self.pi, u)));
+        expectedCVaR = Expr.add(nu, Expr.mul(betaMod, Expr.dot(self.pi, u)));
         MODEL.objective('obj', ObjectiveSense.Minimize, Expr.add(expectedDeviation, Expr.mul(rho, expectedCVaR)));
 
+        # Scenario returns of the portfolio
+        portfolioReturns = self.scenarioReturns(MODEL, w);
+
         # Budget constraint
         MODEL.constraint('budgetConstraint', Expr.dot(eBudget, w), Domain.equalsTo(1))
 
         # TE constraint
-        MODEL.constraint('TEConstraint1', Expr.sub(Expr.mul(self.excessReturns, w), y), Domain.lessThan(0.0))
-        MODEL.constraint('TEConstraint2', Expr.sub(Expr.mul(-1, Expr.mul(self.excessReturns, w)), y), Domain.lessThan(0.0))
+        MODEL.constraint('TEConstraint1', Expr.sub(portfolioReturns, y), Domain.lessThan(0.0))
+        MODEL.constraint('TEConstraint2', Expr.sub(Expr.mul(-1, portfolioReturns), y), Domain.lessThan(0.0))
 
         # CVaR constraint
-        MODEL.constraint('CVaRConstraint', Expr.add(Expr.mul(self.excessReturns, w), Expr.add(Expr.mul(nu, eCVaR), u)), Domain.greaterThan(0.0))
+        MODEL.constraint('CVaRConstraint', Expr.add(portfolioReturns, Expr.add(Expr.mul(nu, eCVaR), u)), Domain.greaterThan(0.0))
 
         recordedValues = ["obj", "gamma", "beta", "TE", "VaR", "CVaR"];
         columns = recordedValues + [i for i in range(1,N+1)];
         results = pd.DataFrame(columns=columns)
+        self.solveLog = [];
+
+        # Sweep alpha on the same model (rows are ordered by alpha first), by default only the alpha of the data
+        alphaData = self.alpha;
+        if alphaCollection is None:
+            alphaCollection = np.array([alphaData]);
+
+        with tqdm(total=len(alphaCollection)*len(rhoCollection)*len(betaCollection), disable=not(progressBar)) as pbar:
+            for alphaNext in alphaCollection:
+
+                # Shift the excess returns of the data and the model by the new spread
+                self.setAlpha(alphaNext);
+                alpha.setValue(alphaNext);
+
+                for rhoNew in rhoCollection:
+                    for betaNew in betaCollection:
 
-        # Solve optimization.
-        MODEL.solve();
+                        # Set parameters
+                        betaMod.setValue(1/(1-betaNew));
+                        rho.setValue(rhoNew);
 
-        # Get problem status.
-        prosta = MODEL.getProblemStatus();
+                        # Solve optimization
+                        self.solveModel(MODEL, alpha=alphaNext, rho=rhoNew, beta=betaNew);
 
-        # If model is not infeasible, then record the solution.
-        if prosta != ProblemStatus.PrimalInfeasible:
+                        # Get problem status
+                        prosta = MODEL.getProblemStatus();
 
-            # Compute CVaR
-            TE = np.dot(np.array(self.pi), np.abs(self.excessReturns.dot(w.level())))
-            VaR = nu.level()[0]
-            CVaR = VaR + 1/(1-beta)*np.mean(np.maximum(-self.excessReturns.dot(w.level()) - VaR, 0));
+                        # If model is not infeasible, then record the solution.
+                        if prosta != ProblemStatus.PrimalInfeasible:
 
-            # Save row
-            row = pd.DataFrame([MODEL.primalObjValue(), rho, beta, TE, VaR, CVaR] + list(w.level()), index=columns, columns=[0]);
+                            # Compute CVaR
+                            TE = np.dot(np.array(self.pi), np.abs(self.excessReturns.dot(w.level())))
+                            VaR = nu.level()[0]
+                            CVaR = VaR + 1/(1-betaNew)*np.dot(np.array(self.pi), np.maximum(-self.excessReturns.dot(w.level()) - VaR, 0));
 
-            # Concatenate with exisiting results
-            results = pd.concat([results, row.T], axis=0);
+                            # Save row
+                            row = pd.DataFrame([MODEL.primalObjValue(), rhoNew, betaNew, TE, VaR, CVaR] + list(w.level()), index=columns, columns=[0]);
+
+                            # Concatenate with exisiting results
+                            results = pd.concat([results, row.T], axis=0);
+
+                        else:
+                            print("Solution could not be found for (rho, beta) = ({},{}).".format(rhoNew, betaNew));
+                            print(prosta);
+
+                        # Update progress bar
+                        pbar.update(1);
+
+        # Restore the spread of the data
+        self.setAlpha(alphaData);
 
         # Set optimal portfolio
         self.optimalPortfolio = results.iloc[0, :];
         self.optimalPortfolio = self.optimalPortfolio.values[len(recordedValues):];
         self.isOptimal = True;
 
+        # Get rid of model
+        MODEL.dispose()
+
+        # Set index
+        results.index = [i for i in range(0, len(results))];
+        results.attrs['solveLog'] = self.solveLogTable(); # -> One record per solve (see solveModel)
         return results;
 
     def approximateObjective(self, returnsAssets, returnsIndex, w):
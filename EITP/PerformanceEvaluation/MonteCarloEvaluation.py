@@ -0,0 +1,124 @@
+import math
+import numpy as np
+import pandas as pd
+from EITP.SDE.MV.Calibrator import MultivariateCalibrator
+from EITP.SDE.MV.GBM import GeometricBrownianMotionPaths
+
+class MonteCarloEvaluation:
+
+    def __init__(self, returnsAssets=np.ones((10,9)), returnsIndex=np.ones((10,1)), beta=0.95, rho=2, alpha=0.00, dt=1/252, objective="ExcessCVaR"):
+
+        # Out-of-sample evaluation of fitted portfolios on many synthetic test windows instead of one realized test block.
+        # The index and the assets are calibrated jointly as a multivariate GBM (index first), and objective is the
+        # loss the portfolios were fitted for: "ExcessCVaR" (-mean + rho CVaR of the excess returns, as in the RAERM and
+        # excess CVaR models) or "TrackingCVaR" (mean absolute tracking error + rho CVaR of it, as in the ITM models).
+        self.beta = beta;
+        self.rho = rho;
+        self.alpha = alpha;
+        self.dt = dt;
+        self.objective = objective;
+
+        # Per-window metrics of the last evaluation (metric -> windows x portfolios)
+        self.windowMetrics = None;
+
+        self.calibrate(returnsAssets, returnsIndex);
+
+    # Method 1: Calibrate the GBM of the index and the assets on the training returns
+    def calibrate(self, returnsAssets, returnsIndex):
+
+        # Price levels of the index and the assets (the calibrator works on paths with a time column)
+        returns = np.column_stack([np.asarray(returnsIndex).reshape(-1), returnsAssets]);
+        levels = np.vstack([np.ones(returns.shape[1]), np.cumprod(1 + returns, axis=0)]);
+        paths = pd.DataFrame(np.column_stack([self.dt*np.arange(levels.shape[0]), levels]));
+
+        # The Cholesky factor is used directly as SIGMA in the simulations
+        hatMu, hatSigma, _ = MultivariateCalibrator(paths, cholesky=True);
+        self.setModel(hatMu, hatSigma);
+
+    # Method 2: Use a given GBM (index first) instead of the calibrated one
+    def setModel(self, mu, SIGMA):
+
+        self.mu = np.asarray(mu, dtype=np.float64);
+        self.SIGMA = np.asarray(SIGMA, dtype=np.float64);
+        self.M = len(self.mu) - 1;
+
+    # Method 3: Simulate test windows of T daily returns in chunks, each chunk with its own child stream of SeedSequence(seed)
+    def simulateWindows(self, nWindows, T, chunkSize=500, seed=0):
+
+        nChunks = math.ceil(nWindows/chunkSize);
+        streams = np.random.SeedSequence(seed).spawn(nChunks);
+
+        for k, stream in enumerate(streams):
+            size = min(chunkSize, nWindows - k*chunkSize);
+            _, levels = GeometricBrownianMotionPaths(mu=self.mu, SIGMA=self.SIGMA, tN=T*self.dt, dt=self.dt, X0=1, n_sim=size, rng=stream);
+            levels = levels[:,:T+1,:];
+
+            # Simple returns (windows x T x (1 + M)), the index is the first series
+            returns = levels[:,1:,:]/levels[:,:-1,:] - 1;
+            yield returns[:,:,1:], returns[:,:,0];
+
+    # Method 4: Metrics of every portfolio on every window of a chunk (windows x T x M assets, K portfolios)
+    def batchMetrics(self, weights, returnsAssets, returnsIndex):
+
+        # Excess returns over the enhanced index (windows x T x K)
+        excess = returnsAssets @ weights.T - (returnsIndex + self.alpha)[:,:,None];
+
+        metrics = dict();
+        metrics['AverageExcessReturn'] = np.mean(excess, axis=1);
+        metrics['DownsideSemiStandardDeviation'] = np.sqrt(np.mean(np.square(np.minimum(excess, 0)), axis=1));
+        metrics['RMSE'] = np.sqrt(np.mean(np.square(excess), axis=1));
+        metrics['BeatBenchmarkRatio'] = np.mean(excess > 0, axis=1);
+
+        # Total excess return of the portfolios (starting at 100) over the enhanced index
+        portfolioLevel = 100*np.prod(1 + excess + (returnsIndex + self.alpha)[:,:,None], axis=1);
+        metrics['ExcessReturn'] = portfolioLevel - 100*np.prod(1 + returnsIndex + self.alpha, axis=1)[:,None];
+
+        if self.objective == "ExcessCVaR":
+            VaR = -np.quantile(excess, 1-self.beta, axis=1);
+            CVaR = VaR + 1/(1-self.beta)*np.mean(np.maximum(-excess - VaR[:,None,:], 0), axis=1);
+            metrics['Objective'] = -metrics['AverageExcessReturn'] + self.rho*CVaR;
+        else:
+            trackingError = np.abs(excess);
+            VaR = np.quantile(trackingError, self.beta, axis=1);
+            CVaR = VaR + 1/(1-self.beta)*np.mean(np.maximum(trackingError - VaR[:,None,:], 0), axis=1);
+            metrics['TE'] = np.mean(trackingError, axis=1);
+            metrics['Objective'] = metrics['TE'] + self.rho*CVaR;
+
+        metrics['VaR-{}'.format(self.beta)] = VaR;
+        metrics['CVaR-{}'.format(self.beta)] = CVaR;
+        return metrics;
+
+    # Method 5: Evaluate a batch of portfolios on nWindows simulated windows of T days. Only one chunk of paths is held
+    # in memory at a time, the per-window metrics are kept for the summaries.
+    def evaluate(self, weights, nWindows=10000, T=252, chunkSize=500, seed=0, inSampleObjective=None):
+
+        # Weights as portfolios x assets (the results of solve() are accepted as they are)
+        if isinstance(weights, pd.DataFrame):
+            weights = weights[[i for i in range(1, self.M+1)]].values;
+        weights = np.atleast_2d(np.asarray(weights, dtype=np.float64));
+
+        chunks = [];
+        for returnsAssets, returnsIndex in self.simulateWindows(nWindows, T, chunkSize=chunkSize, seed=seed):
+            chunks.append(self.batchMetrics(weights, returnsAssets, returnsIndex));
+        self.windowMetrics = {metric: np.concatenate([chunk[metric] for chunk in chunks], axis=0) for metric in chunks[0]};
+
+        return self.summary(inSampleObjective);
+
+    # Method 6: Distribution of the out-of-sample metrics per portfolio (one row per portfolio and metric)
+    def summary(self, inSampleObjective=None, percentiles=(5, 25, 50, 75, 95)):
+
+        rows = [];
+        for metric, values in self.windowMetrics.items():
+            quantiles = np.percentile(values, percentiles, axis=0);
+            for k in range(values.shape[1]):
+                row = {'portfolio': k, 'metric': metric, 'mean': np.mean(values[:,k]), 'std': np.std(values[:,k], ddof=1)};
+                row.update({'P{}'.format(p): quantiles[i,k] for i, p in enumerate(percentiles)});
+
+                # Optimizer's curse: how much worse the portfolios do out-of-sample than their in-sample objective promised
+                if inSampleObjective is not None and metric == 'Objective':
+                    row['inSample'] = np.asarray(inSampleObjective).reshape(-1)[k];
+                    row['optimism'] = row['mean'] - row['inSample'];
+                    row['probabilityWorse'] = np.mean(values[:,k] > row['inSample']);
+                rows.append(row);
+
+        return pd.DataFrame(rows);
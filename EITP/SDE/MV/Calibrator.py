@@ -4,7 +4,36 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy.stats import norm
 
-def MultivariateCalibrator(paths, assumption="GBM", method="MLE"):
+def nearestPSD(covariance, repair="clip", floor=0):
+
+    # One-shot repair of a symmetric matrix that is not positive semi-definite, using a single eigendecomposition.
+    # "clip": eigenvalue clipping at floor, the nearest PSD matrix in the Frobenius norm.
+    # "correlation": clipping of the correlation matrix followed by a rescaling to unit diagonal (one projection step of
+    # Higham's nearest correlation matrix), so the variances of the assets are kept.
+    # Returns the repaired matrix and (for "clip") its eigenvalues and eigenvectors.
+    covariance = (covariance + covariance.T)/2
+
+    if repair == "clip":
+        lambdas, Q = np.linalg.eigh(covariance)
+        lambdas = np.maximum(lambdas, floor)
+        return (Q * lambdas) @ Q.T, lambdas, Q
+
+    elif repair == "correlation":
+        std = np.sqrt(np.maximum(np.diag(covariance), np.finfo(float).tiny))
+        lambdas, Q = np.linalg.eigh(covariance/np.outer(std, std))
+        lambdas = np.maximum(lambdas, floor)
+
+        # Rows of the factor B = Q sqrt(lambdas) are scaled to unit length, so B B' has unit diagonal
+        B = Q * np.sqrt(lambdas)
+        B = std[:,None] * B/np.linalg.norm(B, axis=1, keepdims=True)
+
+        # The eigenvectors change with the rescaling, so they are not returned
+        return B @ B.T, None, None
+
+    else:
+        raise ValueError("Unknown repair method {}. Use 'clip' or 'correlation'.".format(repair))
+
+def MultivariateCalibrator(paths, assumption="GBM", method="MLE", repair="clip", floor=0, cholesky=False):
 
     samplePoints, numberOfPaths = paths.shape
     numberOfPaths = numberOfPaths - 1
@@ -26,24 +55,35 @@ def MultivariateCalibrator(paths, assumption="GBM", method="MLE"):
             ExpectedLogReturns = np.mean(logReturns, axis=0)
             CovLogReturns = np.cov(logReturns, rowvar=False)
 
-            # Then we decompose CovLogReturns. We have to make sure it is positive semi-definite.
-            machinePrecision = np.finfo(float).eps
-            pertubationDiagonal = (machinePrecision**(1/1.1))*np.identity(N)
-            lambdas, Q = np.linalg.eigh(1/dt*CovLogReturns)
-            maxIter = 1000
-            counter = 0
+            # Then we decompose CovLogReturns. We have to make sure it is positive semi-definite, which is repaired in one
+            # decomposition (see nearestPSD)
+            if cholesky:
+
+                # The lower Cholesky factor can be used directly as SIGMA in the simulations (SIGMA SIGMA' is the covariance).
+                # A positive definite covariance needs no eigendecomposition at all.
+                try:
+                    hatSigma = np.linalg.cholesky(1/dt*CovLogReturns)
+                except np.linalg.LinAlgError:
+                    print("Not positive definite. Repairing the covariance ({}).".format(repair))
+                    # The factorization needs strictly positive eigenvalues, so the floor is kept above the rounding errors
+                    floor = max(floor, N*np.finfo(float).eps*np.trace(1/dt*CovLogReturns))
+                    hatSigma = np.linalg.cholesky(nearestPSD(1/dt*CovLogReturns, repair=repair, floor=floor)[0])
+
+                # The correlation follows from the covariance, since the factor is not symmetric
+                hatCovariance = hatSigma @ hatSigma.T
+                hatCorrelationSigma = np.diag(1/np.sqrt(np.diag(hatCovariance))) @ hatCovariance @ np.diag(1/np.sqrt(np.diag(hatCovariance)))
 
-            while any(lambdas < 0) and counter < maxIter:
-                print("{}: Not positive definite. Adding pertubation to diagonal.".format(counter+1))
-                CovLogReturns = CovLogReturns + pertubationDiagonal
-                lambdas, Q = np.linalg.eigh(1/dt*CovLogReturns)
-                counter += 1
+            else:
+                hatCovariance, lambdas, Q = nearestPSD(1/dt*CovLogReturns, repair=repair, floor=floor)
+                if Q is None:
+                    lambdas, Q = np.linalg.eigh(hatCovariance)
+                    lambdas = np.maximum(lambdas, 0)
+                rootL = np.diag(np.sqrt(lambdas))
 
-            rootL = np.diag(np.sqrt(lambdas))
+                # Then we find the estimates for GBM
+                hatSigma = Q @ rootL @ Q.T
+                hatCorrelationSigma = np.diag(1/np.sqrt(np.diag(hatSigma))) @ hatSigma @ np.diag(1/np.sqrt(np.diag(hatSigma)))
 
-            # Then we find the estimates for GBM
-            hatSigma = Q @ rootL @ Q.T
-            hatCorrelationSigma = np.diag(1/np.sqrt(np.diag(hatSigma))) @ hatSigma @ np.diag(1/np.sqrt(np.diag(hatSigma)))
             hatMu = 1/2*np.diagonal(hatSigma @ hatSigma.T) + 1/dt*ExpectedLogReturns
 
             # Return estimates
@@ -54,3 +94,61 @@ def MultivariateCalibrator(paths, assumption="GBM", method="MLE"):
 
     else:
         return(0)
+
+def RollingCalibrator(paths, window=252, refresh=250, step=1, crossProducts=True, ddof=1):
+
+    # Method: Maximum Likelihood Estimation of a GBM on every rolling window of window log-returns in one pass.
+    # The sums and cross-products of the log-returns are updated as observations enter and leave the window, so each
+    # window costs O(N^2) instead of O(window N^2). They are recomputed from scratch every refresh observations to remove the
+    # accumulated rounding errors. The log-returns are shifted by the window mean at the last refresh, which keeps the
+    # cancellation in the variance small. With crossProducts=False only the variances are tracked (O(N) per window).
+    # Every step-th window is emitted.
+
+    # Calculate discretization
+    dt = np.mean(np.diff(paths.iloc[:,0].values, n=1, axis=0))
+    times = paths.iloc[1:,0].values
+
+    # Calculate log-returns
+    logReturns = np.diff(np.log(paths.iloc[:,1:].values), n=1, axis=0)
+    T,N = logReturns.shape
+
+    if window > T:
+        print("The window ({}) is longer than the {} log-returns.".format(window, T))
+        return 0
+
+    def products(X):
+        return X.T @ X if crossProducts else np.sum(X**2, axis=0)
+
+    windowEnds = list(range(window, T + 1, step))
+    hatMu = np.empty((len(windowEnds), N))
+    hatCovariance = np.empty((len(windowEnds), N, N) if crossProducts else (len(windowEnds), N))
+
+    end = window
+    sinceRefresh = refresh
+    for k, windowEnd in enumerate(windowEnds):
+
+        # Move the window to windowEnd
+        if sinceRefresh >= refresh:
+            shift = np.mean(logReturns[windowEnd-window:windowEnd,:], axis=0)
+            shifted = logReturns[windowEnd-window:windowEnd,:] - shift
+            sums = np.sum(shifted, axis=0)
+            crossSums = products(shifted)
+            sinceRefresh = 0
+        else:
+            entering = logReturns[end:windowEnd,:] - shift
+            leaving = logReturns[end-window:windowEnd-window,:] - shift
+            sums = sums + np.sum(entering, axis=0) - np.sum(leaving, axis=0)
+            crossSums = crossSums + products(entering) - products(leaving)
+        end = windowEnd
+        sinceRefresh += step
+
+        # Sample moments of the window
+        meanShifted = sums/window
+        covariance = (crossSums - window*(np.outer(meanShifted, meanShifted) if crossProducts else meanShifted**2))/(window - ddof)
+
+        # Then we find the estimates for GBM
+        hatCovariance[k] = 1/dt*covariance
+        hatMu[k] = 1/2*(np.diag(hatCovariance[k]) if crossProducts else hatCovariance[k]) + 1/dt*(meanShifted + shift)
+
+    # Estimates are stamped with the time of the last observation of the window
+    return times[np.array(windowEnds) - 1], hatMu, hatCovariance
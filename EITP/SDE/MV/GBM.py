@@ -1,4 +1,5 @@
 from EITP.SDE.UV.EulerMaruyama import EulerMaruyama
+from EITP.SDE.Random import getGenerator
 import numpy as np
 import math
 import pandas as pd
@@ -11,33 +12,47 @@ import matplotlib.pyplot as plt
 mu = np.array([0.07, 0.01])
 SIGMA = np.array([[1, 0], [0, 1]])
 
-def GeometricBrownianMotion(mu = np.array([]), SIGMA = SIGMA, tN = 100, t0 = 0, dt = 0.001, X0 = 1, plot = False, title = r'Geometric Brownian Motion', verbose=False):
+def GeometricBrownianMotionPaths(mu = np.array([]), SIGMA = SIGMA, tN = 100, t0 = 0, dt = 0.001, X0 = 1, n_sim = 1, chunkSize = 10000, rng = None):
+
+    # Exact scheme in log-space: log X_{t+dt} = log X_t + (mu - diag(SIGMA SIGMA')/2) dt + SIGMA dW_t, so all increments
+    # are drawn at once (per chunk of chunkSize time steps) and the levels follow from cumulative sums.
+    # rng is a numpy Generator or a seed (None uses the global NumPy state).
+    rng = getGenerator(rng)
+    mu = np.asarray(mu, dtype=np.float64)
+    SIGMA = np.atleast_2d(np.asarray(SIGMA, dtype=np.float64))
+    nAssets = len(mu)
+
+    size = math.ceil((tN - t0)/dt)
+    time_array = t0 + dt*np.arange(size + 1)
+
+    # Drift and loadings are applied once per chunk
+    driftTerm = (mu - (1/2)*np.sum(SIGMA**2, axis=1))*dt
+    loadings = np.sqrt(dt)*SIGMA.T
+
+    # Log-levels of all path sets (n_sim x time x assets)
+    paths = np.empty((n_sim, size + 1, nAssets))
+    paths[:,0,:] = np.log(X0)
+
+    for start in range(0, size, chunkSize):
+        steps = min(chunkSize, size - start)
+        Z = rng.standard_normal((n_sim, steps, SIGMA.shape[1]))
+        paths[:,start+1:start+1+steps,:] = paths[:,[start],:] + np.cumsum(driftTerm + Z @ loadings, axis=1)
+
+    np.exp(paths, out=paths)
+    return time_array, paths
+
+def GeometricBrownianMotion(mu = np.array([]), SIGMA = SIGMA, tN = 100, t0 = 0, dt = 0.001, X0 = 1, plot = False, title = r'Geometric Brownian Motion', verbose=False, rng = None):
 
     start = time.time()
 
     # Get number of assets
     nAssets = len(mu)
 
-    size = math.ceil((tN - t0)/dt)
-    time_points = [t0] + [dt for i in range(0, size)]
-
     column_names = ['Time'] + ['Asset {}'.format(i) for i in range(1, nAssets+1)];
-    time_array = np.cumsum(time_points);
-
-    # Euler Maruyama
-    simulation_array = np.zeros((size + 1,nAssets))
-    simulation_array[0,:]  = X0;
-
-    with tqdm(total=len(time_points)-1, disable=True) as pbar:
-        for i in range(0, len(time_points)-1):
-            Z = np.random.multivariate_normal(np.zeros(nAssets), np.identity(nAssets))
-            dt = time_array[i+1] - time_array[i]
-            dWt = Z * np.sqrt(dt)
-            diagSST = np.diag(SIGMA @ SIGMA.T)
-            diffusionTerm = (SIGMA @ dWt)
-            driftTerm = (mu - (1/2)*diagSST)*dt
-            simulation_array[i+1,:] = simulation_array[i,:]*np.exp(driftTerm + diffusionTerm)
-            pbar.update(1)
+
+    # Simulate one path set (see GeometricBrownianMotionPaths)
+    time_array, paths = GeometricBrownianMotionPaths(mu=mu, SIGMA=SIGMA, tN=tN, t0=t0, dt=dt, X0=X0, n_sim=1, rng=rng)
+    simulation_array = paths[0]
 
     # Then we can make a Pandas data frame
     df = pd.DataFrame(np.column_stack([time_array, simulation_array]));
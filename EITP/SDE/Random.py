@@ -0,0 +1,58 @@
+import math
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+def getGenerator(rng = None):
+
+    # None keeps the global NumPy state (so np.random.seed still reproduces old runs), otherwise rng is a
+    # numpy Generator, a SeedSequence or a seed
+    if rng is None:
+        return np.random.mtrand._rand
+    return np.random.default_rng(rng)
+
+def simulateShard(simulator, n_sim, seedSequence, kwargs):
+
+    # One shard of paths with its own child stream
+    return simulator(n_sim = n_sim, rng = np.random.default_rng(seedSequence), **kwargs)
+
+def pathAxis(paths, sizes):
+
+    # Axis of the paths whose length is the number of simulations of every shard
+    candidates = [axis for axis in range(paths[0].ndim) if all(shard.shape[axis] == size for shard, size in zip(paths, sizes))];
+    if len(candidates) != 1:
+        raise ValueError("Cannot infer the simulation axis from shards of shape {}. Pass axis to simulateParallel.".format(paths[0].shape));
+    return candidates[0];
+
+def joinShards(shards, sizes, axis = None):
+
+    # Simulators return a DataFrame with a 'Time' column, a tuple (time_array, paths) or an array of paths
+    if isinstance(shards[0], pd.DataFrame):
+        simulations = pd.concat([shard.iloc[:,1:] for shard in shards], axis=1)
+        simulations.columns = ['Simulation {}'.format(i) for i in range(1, simulations.shape[1]+1)]
+        return pd.concat([shards[0].iloc[:,[0]], simulations], axis=1)
+
+    if isinstance(shards[0], tuple):
+        paths = [shard[1] for shard in shards];
+        return shards[0][0], np.concatenate(paths, axis=pathAxis(paths, sizes) if axis is None else axis)
+
+    return np.concatenate(shards, axis=pathAxis(shards, sizes) if axis is None else axis)
+
+def simulateParallel(simulator, n_sim = 10, seed = 0, shardSize = 1000, workers = None, axis = None, **kwargs):
+
+    # Splits n_sim paths into shards of shardSize paths, each simulated with its own child stream of SeedSequence(seed).
+    # The shards and their streams only depend on n_sim, seed and shardSize, so the result is bit-identical for any
+    # number of workers. simulator is a module-level function (it is sent to the worker processes) taking n_sim and rng,
+    # e.g. CoxIngersollRossPaths (paths along axis 1) or GeometricBrownianMotionPaths (paths along axis 0). By default
+    # the simulation axis is the one whose length matches n_sim of every shard.
+    nShards = math.ceil(n_sim/shardSize)
+    sizes = [min(shardSize, n_sim - i*shardSize) for i in range(nShards)]
+    streams = np.random.SeedSequence(seed).spawn(nShards)
+
+    if workers == 1 or nShards == 1:
+        shards = [simulateShard(simulator, size, stream, kwargs) for size, stream in zip(sizes, streams)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(simulateShard, [simulator]*nShards, sizes, streams, [kwargs]*nShards))
+
+    return joinShards(shards, sizes, axis)
@@ -1,16 +1,62 @@
 from EITP.SDE.UV.EulerMaruyama import EulerMaruyama
+from EITP.SDE.Random import getGenerator
 import numpy as np
+import math
+import pandas as pd
+import matplotlib.pyplot as plt
 
-def CoxIngersollRoss(lambdA = 0.1, xi = 0.2, gamma = 0.3, tN = 100, t0 = 0, dt = 0.001, X0 = 0, n_sim = 10, plot = False, title = r'Cox-Ingersoll-Ross'):
+def CoxIngersollRossPaths(lambdA = 0.1, xi = 0.2, gamma = 0.3, tN = 100, t0 = 0, dt = 1/252, X0 = 0, n_sim = 10, rng = None):
 
-    def f(state: float, t: float)->"Drift":
-        return(lambdA * (xi - state))
+    # Exact transition of dX = lambdA (xi - X) dt + gamma sqrt(X) dW: given X_t, X_{t+dt}/c is noncentral chi-square with
+    # d = 4 lambdA xi/gamma^2 degrees of freedom and noncentrality X_t exp(-lambdA dt)/c, c = gamma^2 (1 - exp(-lambdA dt))/(4 lambdA).
+    # There is no discretization bias, so dt can be a day or a week. rng is a numpy Generator or a seed.
+    rng = getGenerator(rng)
 
-    def g(state: float, t: float)->"Diffusion":
-        if all(state > 0):
-            return(gamma * np.sqrt(state))
-        else:
-            state[state < 0] = 0
-            return(gamma * np.sqrt(state))
+    size = math.ceil((tN - t0)/dt)
+    time_array = t0 + dt*np.arange(size + 1)
 
-    return EulerMaruyama(tN = tN, f = f, g = g, t0 = t0, dt = dt, X0 = X0, n_sim = n_sim, plot = plot, title = title)
\ No newline at end of file
+    decay = math.exp(-lambdA*dt)
+    c = gamma**2*(1 - decay)/(4*lambdA)
+    d = 4*lambdA*xi/gamma**2
+
+    # One vectorized draw across the simulations per time step
+    paths = np.empty((size + 1, n_sim))
+    paths[0,:] = X0
+    for i in range(size):
+        paths[i+1,:] = c*rng.noncentral_chisquare(d, paths[i,:]*decay/c)
+
+    return time_array, paths
+
+def CoxIngersollRoss(lambdA = 0.1, xi = 0.2, gamma = 0.3, tN = 100, t0 = 0, dt = 0.001, X0 = 0, n_sim = 10, plot = False, title = r'Cox-Ingersoll-Ross', method = "EulerMaruyama", rng = None):
+
+    if method == "EulerMaruyama":
+
+        def f(state: float, t: float)->"Drift":
+            return(lambdA * (xi - state))
+
+        def g(state: float, t: float)->"Diffusion":
+            if all(state > 0):
+                return(gamma * np.sqrt(state))
+            else:
+                state[state < 0] = 0
+                return(gamma * np.sqrt(state))
+
+        return EulerMaruyama(tN = tN, f = f, g = g, t0 = t0, dt = dt, X0 = X0, n_sim = n_sim, plot = plot, title = title, rng = rng)
+
+    elif method == "Exact":
+
+        time_array, paths = CoxIngersollRossPaths(lambdA = lambdA, xi = xi, gamma = gamma, tN = tN, t0 = t0, dt = dt, X0 = X0, n_sim = n_sim, rng = rng)
+
+        # Same output as the Euler-Maruyama scheme
+        df = pd.DataFrame(np.column_stack([time_array, paths]));
+        df.columns = ['Time'] + ['Simulation {}'.format(i) for i in range(1, n_sim+1)];
+
+        if plot:
+            plt.figure(figsize=(10,6), dpi = 100)
+            plt.xlabel('t', fontsize = 14)
+            plt.ylabel(r'$X_{t}$', fontsize = 14)
+            plt.title(title, fontsize = 18)
+            plt.plot(df.iloc[:,0].values, df.iloc[:,1:].values);
+            plt.show()
+
+        return(df)
@@ -8,10 +8,14 @@ from matplotlib import rc
 from scipy.stats import norm
 import time
 from tqdm import tqdm
+from EITP.SDE.Random import getGenerator
 
 # ------------------ EULER-MARUYAMA IMPLEMENTATION ------------------
 
-def EulerMaruyama(tN = 100, t0 = 0, f = lambda X_t, t : 0, g = lambda X_t, t : 1, dt = 0.001, X0 = 0, n_sim = 10, state_manipulation = None, plot = False, verbose=False, title = 'Cox-Ingersoll-Ross'):
+def EulerMaruyama(tN = 100, t0 = 0, f = lambda X_t, t : 0, g = lambda X_t, t : 1, dt = 0.001, X0 = 0, n_sim = 10, state_manipulation = None, plot = False, verbose=False, title = 'Cox-Ingersoll-Ross', rng = None):
+
+    # rng is a numpy Generator or a seed (None uses the global NumPy state)
+    rng = getGenerator(rng)
 
     start = time.time()
 
@@ -22,7 +26,7 @@ def EulerMaruyama(tN = 100, t0 = 0, f = lambda X_t, t : 0, g = lambda X_t, t : 1
     time_array = np.cumsum(time_points);
 
     # Simulation (for now equal time steps are assumed)
-    dWt = norm.ppf(np.random.rand(size + 1,n_sim), loc = 0, scale = math.sqrt(dt))
+    dWt = norm.ppf(rng.random((size + 1,n_sim)), loc = 0, scale = math.sqrt(dt))
 
     # Euler Maruyama
     simulation_array = np.zeros((size + 1,n_sim))
@@ -67,4 +71,52 @@ def EulerMaruyama(tN = 100, t0 = 0, f = lambda X_t, t : 0, g = lambda X_t, t : 1
         plt.plot(df.iloc[:,0].values, df.iloc[:,1:].values);
         plt.show()
 
-    return(df)
\ No newline at end of file
+    return(df)
+# ------------------ STREAMING EULER-MARUYAMA ------------------
+
+def EulerMaruyamaStream(tN = 100, t0 = 0, f = lambda X_t, t : 0, g = lambda X_t, t : 1, dt = 0.001, X0 = 0, n_sim = 10, state_manipulation = None, chunkSize = 256, rng = None):
+
+    # Same scheme as EulerMaruyama, but the paths are yielded as (times, states) per chunk of time steps, with states of
+    # shape (steps, n_sim), so memory grows with chunkSize*n_sim instead of the grid size. The first chunk is X0 at t0.
+    # rng is a numpy Generator or a seed.
+    rng = getGenerator(rng)
+
+    size = math.ceil((tN - t0)/dt)
+    sqrtDt = math.sqrt(dt)
+    state = np.zeros(n_sim) + X0
+
+    # As in EulerMaruyama, the recorded states are the manipulated ones (all but the terminal state)
+    if state_manipulation and size > 0:
+        state = state_manipulation(state)
+
+    yield np.array([t0], dtype=np.float64), state[None,:].copy()
+
+    for start in range(0, size, chunkSize):
+        steps = min(chunkSize, size - start)
+        times = t0 + dt*np.arange(start + 1, start + steps + 1)
+        states = np.empty((steps, n_sim))
+
+        # Increments of the whole chunk at once
+        dWt = sqrtDt*rng.standard_normal((steps, n_sim))
+
+        for i in range(steps):
+            t = t0 + dt*(start + i)
+            state = state + f(state, t) * dt + g(state, t) * dWt[i]
+            if state_manipulation and start + i + 1 < size:
+                state = state_manipulation(state)
+            states[i,:] = state
+
+        yield times, states
+
+def EulerMaruyamaSummary(**kwargs):
+
+    # Terminal values and running extrema of every path, reduced chunk by chunk (arguments as in EulerMaruyamaStream)
+    maximum = None
+    minimum = None
+
+    for times, states in EulerMaruyamaStream(**kwargs):
+        maximum = states.max(axis=0) if maximum is None else np.maximum(maximum, states.max(axis=0))
+        minimum = states.min(axis=0) if minimum is None else np.minimum(minimum, states.min(axis=0))
+        terminal = states[-1,:]
+
+    return {'time': times[-1], 'terminal': terminal, 'maximum': maximum, 'minimum': minimum}
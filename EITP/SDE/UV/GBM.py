@@ -1,4 +1,5 @@
 from EITP.SDE.UV.EulerMaruyama import EulerMaruyama
+from EITP.SDE.Random import getGenerator
 import numpy as np
 import math
 import pandas as pd
@@ -7,7 +8,10 @@ from scipy.stats import norm
 from tqdm import tqdm
 import matplotlib.pyplot as plt
 
-def GeometricBrownianMotion(mu = 0.1, sigma = 0.2, tN = 100, t0 = 0, dt = 0.001, X0 = 1, n_sim = 10, plot = False, title = r'Geometric Brownian Motion', method = "EulerMaruyama", verbose=False):
+def GeometricBrownianMotion(mu = 0.1, sigma = 0.2, tN = 100, t0 = 0, dt = 0.001, X0 = 1, n_sim = 10, plot = False, title = r'Geometric Brownian Motion', method = "EulerMaruyama", verbose=False, rng = None):
+
+    # rng is a numpy Generator or a seed (None uses the global NumPy state)
+    rng = getGenerator(rng)
 
     if method == "EulerMaruyama":
 
@@ -17,7 +21,7 @@ def GeometricBrownianMotion(mu = 0.1, sigma = 0.2, tN = 100, t0 = 0, dt = 0.001,
         def g(state: float, t: float)->"Diffusion":
             return(state*sigma)
 
-        return EulerMaruyama(tN = tN, f = f, g = g, t0 = t0, dt = dt, X0 = X0, n_sim = n_sim, plot = plot, title = title)
+        return EulerMaruyama(tN = tN, f = f, g = g, t0 = t0, dt = dt, X0 = X0, n_sim = n_sim, plot = plot, title = title, rng = rng)
 
     elif method == "Exact":
 
@@ -30,7 +34,7 @@ def GeometricBrownianMotion(mu = 0.1, sigma = 0.2, tN = 100, t0 = 0, dt = 0.001,
         time_array = np.cumsum(time_points);
 
         # Simulation (for now equal time steps are assumed)
-        dWt = norm.ppf(np.random.rand(size + 1,n_sim), loc = 0, scale = math.sqrt(dt))
+        dWt = norm.ppf(rng.random((size + 1,n_sim)), loc = 0, scale = math.sqrt(dt))
 
         # Euler Maruyama
         simulation_array = np.zeros((size + 1,n_sim))
@@ -38,7 +42,7 @@ def GeometricBrownianMotion(mu = 0.1, sigma = 0.2, tN = 100, t0 = 0, dt = 0.001,
 
         with tqdm(total=len(time_points)-1) as pbar:
             for i in range(0, len(time_points)-1):
-                dWt = np.random.normal(loc=0, scale=np.sqrt(time_array[i+1] - time_array[i]), size=(1,n_sim))
+                dWt = rng.normal(loc=0, scale=np.sqrt(time_array[i+1] - time_array[i]), size=(1,n_sim))
                 simulation_array[i+1,:] = simulation_array[i,:]*np.exp((mu - 0.5*sigma**2)*(time_array[i+1] - time_array[i]) + sigma*dWt)
                 pbar.update(1)
 
@@ -118,7 +118,7 @@ if runTests:
                                 returnsIndex=indexReturns[startIndex:endIndex],
                                 beta=beta,
                                 rho=rho,
-                                alpha=alphaDaily, cardinality=True)
+                                alpha=alphaDaily, cardinality=True, maxCardinality=10)
     resultsDRO = modelDRO.solve(epsCollection=epsCollection, rhoCollection=np.array([rho]),
                 betaCollection=np.array([beta]), progressBar=True)
     print(resultsDRO)
@@ -153,6 +153,7 @@ if runExperiment1:
     trainingSizes = [63, 126, 189, 252, 504, 756]
     testSize = 63                                  # Test on 6 months of data (2 quarters)
     totalEps = len(epsCollection)
+    rollingWindow = True                           # Replace only the scenarios that enter/leave the window
 
     # -------- PREPARE DATA COLLECTION --------
     totalMetrics = 21
@@ -188,8 +189,14 @@ if runExperiment1:
                 startIndex = shift + (windowSizeMax - windowSize)
                 endIndex = shift + windowSizeMax - testSize
 
-                # Instantiate the model
-                MODEL.setData(returnsAssets=assetsReturns[startIndex:endIndex,:], returnsIndex=indexReturns[startIndex:endIndex], beta=beta, rho=rho, alpha=alphaDaily)
+                # Move the window of the live model forward, or instantiate the model
+                if rollingWindow and i > 0 and slideSize < trainingSize:
+                    MODEL.advance(assetsReturns[previousEndIndex:endIndex,:], indexReturns[previousEndIndex:endIndex])
+                else:
+                    MODEL.setData(returnsAssets=assetsReturns[startIndex:endIndex,:], returnsIndex=indexReturns[startIndex:endIndex], beta=beta, rho=rho, alpha=alphaDaily)
+                    if rollingWindow:
+                        MODEL.startRolling()
+                previousEndIndex = endIndex
 
                 # Solve it for all epsilon
                 results = MODEL.solve(epsCollection=epsCollection, rhoCollection=rhoCollection,
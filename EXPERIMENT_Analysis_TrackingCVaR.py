@@ -151,6 +151,8 @@ if runExperiment1:
     trainingSizes = [63, 126, 189, 252, 504, 756]
     testSize = 63                                  # Test on 6 months of data (2 quarters)
     totalEps = len(epsCollection)
+    rollingWindow = True                           # Replace only the scenarios that enter/leave the window
+    warmStart = True                               # Hot-start the simplex from the previous radius
 
     # -------- PREPARE DATA COLLECTION --------
     totalMetrics = 21
@@ -158,6 +160,7 @@ if runExperiment1:
     IS_statistics = np.zeros((len(trainingSizes), nSimulations, len(epsCollection), totalMetrics))
     OoS_statistics = np.zeros((len(trainingSizes), nSimulations, len(epsCollection), totalMetrics))
     Weights_vs_Wasserstein = np.zeros((len(trainingSizes), len(epsCollection), assetsReturns.shape[1]))
+    Iterations = np.zeros((len(trainingSizes), nSimulations))
 
     # -------- START ROLLING-WINDOW --------
     # Initialize model (will never use more than 1000 observations)
@@ -186,12 +189,21 @@ if runExperiment1:
                 startIndex = shift + (windowSizeMax - windowSize)
                 endIndex = shift + windowSizeMax - testSize
 
-                # Instantiate the model
-                MODEL.setData(returnsAssets=assetsReturns[startIndex:endIndex,:], returnsIndex=indexReturns[startIndex:endIndex], beta=beta, rho=rho, alpha=alphaDaily)
+                # Move the window of the live model forward, or instantiate the model
+                if rollingWindow and i > 0 and slideSize < trainingSize:
+                    MODEL.advance(assetsReturns[previousEndIndex:endIndex,:], indexReturns[previousEndIndex:endIndex])
+                else:
+                    MODEL.setData(returnsAssets=assetsReturns[startIndex:endIndex,:], returnsIndex=indexReturns[startIndex:endIndex], beta=beta, rho=rho, alpha=alphaDaily)
+                    if rollingWindow:
+                        MODEL.startRolling()
+                previousEndIndex = endIndex
 
                 # Solve it for all epsilon
                 results = MODEL.solve(epsCollection=epsCollection, rhoCollection=rhoCollection,
-                                        betaCollection=betaCollection, progressBar=False);
+                                        betaCollection=betaCollection, progressBar=False, warmStart=warmStart);
+
+                # Save solver iterations spent on the sweep
+                Iterations[h,i] = np.sum(MODEL.iterations)
 
                 for j in range(totalEps):
 
@@ -234,6 +246,10 @@ if runExperiment1:
                 # Update progress bar
                 pbar.update(1)
 
+    # Report solver effort per sweep
+    for h, trainingSize in enumerate(trainingSizes):
+        print("Training size {}: {:.1f} iterations per sweep on average (warmStart = {}).".format(trainingSize, np.mean(Iterations[h,:]), warmStart))
+
     # Save training sizes as list for recovery
     aux = "_".join(str(e) for e in trainingSizes)
 
@@ -571,31 +587,37 @@ if runExperiment3:
             increments = np.arange(0,rollingMax, slideSize)[:nSimulations]
             totalIncrements = len(increments)
 
-            for k, alpha in enumerate(alphaCollection):
-                for i, shift in enumerate(increments):
+            for i, shift in enumerate(increments):
+
+                # Control moving window (training)
+                startTrain = shift + (windowSizeMax - windowSize)
+                endTrain = shift + windowSizeMax - testSize - validationSize
+
+                # Control moving window (validation)
+                startValidate = shift + (windowSizeMax - windowSize) + trainingSize
+                endValidate = shift + (windowSizeMax - windowSize) + trainingSize + validationSize
 
-                    # Control moving window (training)
-                    startTrain = shift + (windowSizeMax - windowSize)
-                    endTrain = shift + windowSizeMax - testSize - validationSize
+                # Control moving window (testing)
+                startTest = shift + windowSizeMax - testSize
+                endTest = shift + windowSizeMax
 
-                    # Control moving window (validation)
-                    startValidate = shift + (windowSizeMax - windowSize) + trainingSize
-                    endValidate = shift + (windowSizeMax - windowSize) + trainingSize + validationSize
+                # Control moving window (retrain)
+                startFullTrain = startTrain
+                endFullTrain = endTrain + validationSize
 
-                    # Control moving window (testing)
-                    startTest = shift + windowSizeMax - testSize
-                    endTest = shift + windowSizeMax
+                # Set data (alpha is a parameter of the model, so the data is only set once)
+                MODEL.setData(returnsAssets=assetsReturns[startTrain:endTrain,:], returnsIndex=indexReturns[startTrain:endTrain], beta=beta, rho=rho, alpha=alphaCollection[0])
 
-                    # Control moving window (retrain)
-                    startFullTrain = startTrain
-                    endFullTrain = endTrain + validationSize
+                # Solve it for all alpha and epsilon on one model (rows are ordered by alpha first)
+                resultsAlpha = MODEL.solve(epsCollection=epsCollection, rhoCollection=rhoCollection,
+                                           betaCollection=betaCollection, progressBar=False, alphaCollection=alphaCollection);
 
-                    # Set data
-                    MODEL.setData(returnsAssets=assetsReturns[startTrain:endTrain,:], returnsIndex=indexReturns[startTrain:endTrain], beta=beta, rho=rho, alpha=alpha)
+                # Find the optimal radius for each alpha on the validation set
+                for k, alpha in enumerate(alphaCollection):
 
-                    # Solve it for all epsilon
-                    results = MODEL.solve(epsCollection=epsCollection, rhoCollection=rhoCollection,
-                                            betaCollection=betaCollection, progressBar=False);
+                    # Results and spread for this alpha
+                    results = resultsAlpha.iloc[k*len(epsCollection):(k+1)*len(epsCollection), :]
+                    MODEL.setAlpha(alpha)
 
                     # Create aray to find optimal radius
                     candidates = np.zeros(totalEps-1)
@@ -614,10 +636,18 @@ if runExperiment3:
                     indexEpsOpt = np.argmin(candidates)
                     epsOpt[h,k,i] = epsCollection[indexEpsOpt+1]
 
-                    # Retrain with optimal radius
-                    MODEL.setData(returnsAssets=assetsReturns[startFullTrain:endFullTrain,:], returnsIndex=indexReturns[startFullTrain:endFullTrain], beta=beta, rho=rho, alpha=alpha)
-                    results = MODEL.solve(epsCollection=np.array([0] + [epsOpt[h,k,i]]), rhoCollection=rhoCollection,
-                                            betaCollection=betaCollection, progressBar=False);
+                # Retrain with the optimal radii of all alpha in one sweep over the alpha parameter (rows are ordered by alpha first)
+                epsRetrain = np.concatenate([[0], np.unique(epsOpt[h,:,i])])
+                MODEL.setData(returnsAssets=assetsReturns[startFullTrain:endFullTrain,:], returnsIndex=indexReturns[startFullTrain:endFullTrain], beta=beta, rho=rho, alpha=alphaCollection[0])
+                resultsRetrain = MODEL.solve(epsCollection=epsRetrain, rhoCollection=rhoCollection, betaCollection=betaCollection,
+                                             progressBar=False, alphaCollection=alphaCollection);
+
+                for k, alpha in enumerate(alphaCollection):
+
+                    # SAA row and the row of the optimal radius for this alpha
+                    MODEL.setAlpha(alpha)
+                    results = resultsRetrain.iloc[k*len(epsRetrain):(k+1)*len(epsRetrain), :]
+                    results = results.iloc[[0, int(np.flatnonzero(epsRetrain == epsOpt[h,k,i])[0])], :]
 
                     # Set weights (see displacement factor - in this case 7 - from the model file)
                     wDRO = np.array(results.iloc[1,7:].values, dtype=np.float32)
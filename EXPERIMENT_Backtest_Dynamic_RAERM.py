@@ -30,6 +30,7 @@ from EITP.Models.ExcessCVaRModelDRO import ExcessCVaRModelDRO as ExcessCVaRModel
 from EITP.PerformanceEvaluation.QuantitativeStatistics import PerformanceMetrics;
 from EITP.DataHandlers.DataLoader import DataLoader;
 from EITP.Auxiliaries.Logger import write_parameters_to_file;
+from EITP.Auxiliaries.StageProfiler import StageProfiler;
 
 # Print that script is starting
 print("\n#########################################################################################\n")
@@ -75,6 +76,10 @@ oneQuarter = 63
 trainingSizes = [oneQuarter, 2*oneQuarter, 3*oneQuarter, 4*oneQuarter, 8*oneQuarter]
 nTrainingSizes = len(trainingSizes)
 
+# Start each window from the previous window's optimal portfolio
+warmStart = True
+measureWarmStart = False                        # Also solve the retrain cold to count the saved iterations (doubles the retrain solves)
+
 #########################################################################################
 #                             Prepare Rebalance Dates
 #########################################################################################
@@ -130,10 +135,17 @@ totalMetrics = 21
 OoS_statistics = np.zeros((nModels, nTrainingSizes, len(rebalanceIndices), totalMetrics))
 IS_statistics = np.zeros((nModels, nTrainingSizes, len(rebalanceIndices), totalMetrics))
 
+# Allocate memory for solver iterations of the retrain solve
+iterationsWarm = np.zeros((nTrainingSizes, len(rebalanceIndices)))
+iterationsCold = np.zeros((nTrainingSizes, len(rebalanceIndices)))
+
 # Initialize model and metrics engine
 MODEL = RAERMDRO(returnsAssets=assetsReturns[:1000,:], returnsIndex=indexReturns[:1000], beta=beta, rho=rho, alpha=alphaDaily);
 PM = PerformanceMetrics()
 
+# Time the stages of each rebalance (set EITP_PROFILE=1 for a cProfile dump per window in ./Results/Profiles/)
+profiler = StageProfiler(name="Backtest_{}".format(MODEL.__class__.__name__))
+
 # Start the experiment. We do not include last rebalancing date as it defines the end of the experiment.
 with tqdm(total=len(rebalanceIndices[:-1])*nTrainingSizes, disable=False) as pbar:
     for TS, trainingSize in enumerate(trainingSizes):
@@ -141,9 +153,17 @@ with tqdm(total=len(rebalanceIndices[:-1])*nTrainingSizes, disable=False) as pba
         # First period must be treated separately
         Tdx = 0
 
+        # No previous window to start from
+        x0 = None
+        previousTickers = None
+
         # Begin backtest for new training size
         for k,idx in enumerate(rebalanceIndices[:-1]):
 
+            # Start timing the window
+            profiler.startWindow("TS{}_{}".format(trainingSize, k))
+            profiler.stage("tickerLookup")
+
             # Specify size of validation set in percentage of trainingSize
             validationSize = int(validationPercentage * trainingSize)
 
@@ -160,25 +180,35 @@ with tqdm(total=len(rebalanceIndices[:-1])*nTrainingSizes, disable=False) as pba
             periodTickers = list(priceData.columns[:2]) + [ticker for ticker in periodTickers if ticker in priceData.columns]
 
             # Some of tickers are not available from the data sources. Remove them.
+            profiler.stage("priceSlicing")
             selectedPrices = priceData[priceData['Dates'] >= periodStart].copy()
             selectedPrices = selectedPrices[selectedPrices['Dates'] <= nextPeriodStart]
             selectedPrices = selectedPrices.loc[:, periodTickers]
             selectedPrices = selectedPrices.dropna(axis=1)
 
             # Calculate returns from selectedPrices
+            profiler.stage("returns")
             indexReturns = selectedPrices.iloc[:,1].pct_change().dropna(axis=0).values
             assetsReturns = selectedPrices.iloc[:,2:].pct_change().dropna(axis=0).values
 
+            # Map the previous window's portfolio onto the current universe
+            tickers = list(selectedPrices.columns[2:])
+            if x0 is not None:
+                x0 = {'w': MODEL.alignPortfolio(x0['w'], previousTickers, tickers), 'nu': x0['nu']}
+
             # Set the training data
+            profiler.stage("validationSolve")
             endTrainingIndex = (trainingSize - validationSize)
             endValidationIndex = trainingSize
             MODEL.setData(returnsAssets=assetsReturns[:endTrainingIndex,:], returnsIndex=indexReturns[:endTrainingIndex], beta=beta, rho=rho, alpha=alphaDaily)
 
             # Solve it for all epsilon
             results = MODEL.solve(epsCollection=epsCollection, rhoCollection=rhoCollection,
-                                    betaCollection=betaCollection, progressBar=False);
+                                    betaCollection=betaCollection, progressBar=False,
+                                    warmStart=warmStart, x0=x0 if warmStart else None);
 
             # Get the optimal epsilon
+            profiler.stage("validationScoring")
             candidates = np.zeros(totalEps)
             for jdx in range(totalEps):
 
@@ -198,14 +228,29 @@ with tqdm(total=len(rebalanceIndices[:-1])*nTrainingSizes, disable=False) as pba
             epsOpt[TS,k] = epsCollection[indexEpsOpt]
 
             # Retrain model with optimal epsilon
+            profiler.stage("retrainSolve")
             MODEL.setData(returnsAssets=assetsReturns[:trainingSize,:], returnsIndex=indexReturns[:trainingSize], beta=beta, rho=rho, alpha=alphaDaily)
             results_SAA_DRO = MODEL.solve(epsCollection=np.array([0, epsOpt[TS,k]]), rhoCollection=rhoCollection,
-                                    betaCollection=betaCollection, progressBar=False);
+                                    betaCollection=betaCollection, progressBar=False,
+                                    warmStart=warmStart, x0=x0 if warmStart else None);
+            iterationsWarm[TS,k] = np.sum(MODEL.iterations)
+
+            # Count the iterations of the same retrain solve without initial point (same optimizer, so both count simplex pivots)
+            profiler.stage("coldRetrainSolve")
+            if warmStart and measureWarmStart and x0 is not None:
+                MODEL.solve(epsCollection=np.array([0, epsOpt[TS,k]]), rhoCollection=rhoCollection,
+                            betaCollection=betaCollection, progressBar=False, warmStart=warmStart, optimizer="primalSimplex");
+                iterationsCold[TS,k] = np.sum(MODEL.iterations)
 
             # Save portfolios
+            profiler.stage("testPortfolio")
             wSAA = np.array(results_SAA_DRO.iloc[0,7:].values, dtype=np.float64)
             wDRO = np.array(results_SAA_DRO.iloc[1,7:].values, dtype=np.float64)
 
+            # Keep DRO portfolio and VaR as initial point for the next window
+            x0 = {'w': wDRO, 'nu': results_SAA_DRO.iloc[1,5]}
+            previousTickers = tickers
+
             # Test SAA portfolios on OoS
             MODEL.setOptimalPortfolio(wSAA)
             _, index_OoS, enhancedIndex_OoS, portfolioSAA_OoS = MODEL.testPortfolio(assetsReturns[trainingSize:,:],
@@ -229,6 +274,7 @@ with tqdm(total=len(rebalanceIndices[:-1])*nTrainingSizes, disable=False) as pba
                                                                                     dataName="S&P500")
 
             # Save statistics
+            profiler.stage("getMetrics")
             PM.setData(portfolio=portfolioSAA_IS, index=index_IS, enhancedIndex=enhancedIndex_IS)
             metricsRecordings_SAA_IS = PM.getMetrics(rho=rho, beta=beta)
 
@@ -260,6 +306,7 @@ with tqdm(total=len(rebalanceIndices[:-1])*nTrainingSizes, disable=False) as pba
                 OoS_statistics[1,TS,k,j] = metricsRecordings_DRO_OoS[key]
 
             # Save trajectories
+            profiler.stage("trajectoryStitching")
             if Tdx == 0:
 
                 index_OoS, enhancedIndex_OoS, portfolioSAA_OoS
@@ -307,8 +354,22 @@ with tqdm(total=len(rebalanceIndices[:-1])*nTrainingSizes, disable=False) as pba
                 Tdx += increment
 
             # Update progress bar
+            profiler.endWindow()
             pbar.update(1)
 
+# Report iterations saved by starting from the previous window (first window of each training size has no initial point)
+if warmStart and measureWarmStart:
+    for TS, trainingSize in enumerate(trainingSizes):
+        savedIterations = iterationsCold[TS,1:-1] - iterationsWarm[TS,1:-1]
+        print("Training size {}: {:.1f} iterations saved per window on average ({:.1f} warm vs. {:.1f} cold).".format(
+            trainingSize, np.mean(savedIterations), np.mean(iterationsWarm[TS,1:-1]), np.mean(iterationsCold[TS,1:-1])))
+
+# Report where the time of the backtest went
+stageSummary = profiler.summary()
+print("\nTime per stage of the rebalances:\n", stageSummary.to_string())
+stageSummary.to_csv("./Results/Backtest/RAERM/StageProfile.csv")
+profiler.windowTable().to_csv("./Results/Backtest/RAERM/StageProfileWindows.csv")
+
 # ORDER
 # ["Index", "Enhanced Index", "SAA", "DRO"]
 
@@ -0,0 +1,140 @@
+"""
+File: EXPERIMENT_Benchmark_CorrelationDRO.py
+Author: Andreas Engly
+Date: 19-10-2026
+Description: This file compares build and solve times of the correlation-aware DRO model (SDP) with its factor
+             variant (second-order cones) on small instances where both finish.
+
+Dependencies:
+- See below.
+
+Inputs:
+- The instance sizes, ranks and model parameters can be modified below.
+
+Output:
+- A table with build time, solve time and objective per instance is printed and saved to ./Results/Benchmark/.
+
+Note:
+- The factor variant only constrains the variances of the leading factors of hatSigma and uses one gamma per scenario
+  and affine piece, so the objectives differ from the SDP. Both bound the worst-case risk from above.
+
+"""
+
+# Load dependencies
+import os
+import time
+import datetime as dt
+import numpy as np
+import pandas as pd
+import gc
+
+# Imports from module
+from EITP.Models.ExcessCVaRModelDROCorrelation import ExcessCVaRModelDROCorrelation as ExcessCVaRModelDROCorrelation;
+from EITP.Models.ExcessCVaRModelDROCorrelationFast import ExcessCVaRModelDROCorrelationFast as ExcessCVaRModelDROCorrelationFast;
+from EITP.DataHandlers.DataLoader import DataLoader;
+
+# Print that script is starting
+print("\n#########################################################################################\n")
+print("                  Benchmark of the Correlation-Aware DRO Model (SDP vs. SOC)                 ")
+print("\n#########################################################################################\n")
+
+#########################################################################################
+#                             Loading Market Data
+#########################################################################################
+
+# Start by instantiating the data loader
+dataLoader = DataLoader(path='./Data/');
+allData = dataLoader.AggregateData(intersect=True, filtered=False, startDate="2012-01-01", endDate=dt.datetime.today().strftime("%Y-%m-%d"));
+
+# Format the output
+indexReturns = allData.iloc[1:,1].values
+assetsReturns = allData.iloc[1:,2:].values # (risk-free rate is included here already)
+
+# Then we can free priceData from the memory
+del dataLoader
+del allData
+gc.collect()
+
+#########################################################################################
+#                             Benchmark Settings
+#########################################################################################
+
+# Instance sizes (number of assets M, number of scenarios N) small enough for the SDP to finish
+assetSizes = np.array([5, 10, 20])
+scenarioSizes = np.array([25, 50])
+ranks = np.array([2, 5])
+
+# Model parameters (one grid point per solve)
+rho = 2
+beta = 0.95
+eps = 10**(-3)
+kappa = 1.2
+excessReturnAnually = 0
+alphaDaily = (1 + excessReturnAnually)**(1/252)-1
+
+# Random selection of assets and windows
+rng = np.random.default_rng(0)
+
+#########################################################################################
+#                             Run Benchmark
+#########################################################################################
+
+# Set the grid point on a built model (the factor variant also has kappa as a parameter)
+def setParameters(MODEL, kappaParameter=False):
+
+    MODEL.getParameter("WassersteinRadius").setValue(eps);
+    MODEL.getParameter("Alpha").setValue(alphaDaily);
+    MODEL.getParameter("Rho").setValue(rho);
+    MODEL.getParameter("BetaMod").setValue(1/(1-beta));
+    MODEL.getParameter("a1_vec_param").setValue(-1-rho/(1-beta));
+    MODEL.getParameter("b1_vec_param").setValue(rho - rho/(1-beta));
+    if kappaParameter:
+        MODEL.getParameter("Kappa").setValue(kappa);
+
+# Time the build and the solve of one model
+def timeModel(build, kappaParameter=False):
+
+    start = time.perf_counter();
+    MODEL = build();
+    buildTime = time.perf_counter() - start;
+
+    setParameters(MODEL, kappaParameter=kappaParameter);
+    start = time.perf_counter();
+    MODEL.solve();
+    solveTime = time.perf_counter() - start;
+
+    objective = MODEL.primalObjValue();
+    MODEL.dispose();
+    return buildTime, solveTime, objective;
+
+records = []
+
+for M in assetSizes:
+    for N in scenarioSizes:
+
+        # Draw assets and a window of consecutive scenarios
+        assets = rng.choice(assetsReturns.shape[1], size=M, replace=False)
+        start = rng.integers(0, assetsReturns.shape[0] - N)
+        returnsAssets = assetsReturns[start:start+N, assets]
+        returnsIndex = indexReturns[start:start+N]
+
+        # Current SDP
+        modelSDP = ExcessCVaRModelDROCorrelation(returnsAssets=returnsAssets, returnsIndex=returnsIndex, beta=beta, rho=rho, alpha=alphaDaily)
+        buildTime, solveTime, objective = timeModel(lambda: modelSDP.buildModel(kappa))
+        records.append(["SDP", M, N, M, buildTime, solveTime, objective])
+
+        # Factor variant for a few ranks and the full rank
+        for rank in sorted(set([int(r) for r in ranks if r < M] + [int(M)])):
+            modelSOC = ExcessCVaRModelDROCorrelationFast(returnsAssets=returnsAssets, returnsIndex=returnsIndex, beta=beta, rho=rho, alpha=alphaDaily, rank=rank)
+            buildTime, solveTime, objective = timeModel(modelSOC.buildModel, kappaParameter=True)
+            records.append(["SOC", M, N, rank, buildTime, solveTime, objective])
+
+        print("Finished (M, N) = ({}, {}).".format(M, N))
+
+# Summarize
+benchmark = pd.DataFrame(records, columns=["model", "M", "N", "rank", "buildTime", "solveTime", "obj"])
+print("\n", benchmark.to_string(index=False))
+
+# Save results
+os.makedirs("./Results/Benchmark/", exist_ok=True)
+benchmark.to_csv("./Results/Benchmark/CorrelationDRO.csv", index=False)
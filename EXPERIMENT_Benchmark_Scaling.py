@@ -0,0 +1,63 @@
+"""
+File: EXPERIMENT_Benchmark_Scaling.py
+Author: Andreas Engly
+Date: 19-10-2026
+Description: This file times solve() of every model class over a grid of scenarios N, assets M and grid sizes on
+             synthetic returns from EITP.SDE.MV.GBM with a fixed seed. Build time, solve time and peak memory are
+             reported separately and appended to ./Results/Benchmark/Scaling.csv together with the commit, so
+             regressions between commits show up in the comparison at the end.
+
+Dependencies:
+- See below.
+
+Inputs:
+- The grid of sizes, the seed and the size limits of the conic models can be modified below.
+
+Output:
+- A line per case is printed, all cases are appended to ./Results/Benchmark/Scaling.csv and the cases that got slower
+  than the previous commit in the file are printed.
+
+Note:
+- Every case runs in its own process, so the peak memory includes MOSEK and belongs to that case only.
+
+"""
+
+# Load dependencies
+import itertools
+
+# Imports from module
+from EITP.Auxiliaries.Benchmark import MODELS, runSuite, compareCommits;
+
+# The worker processes import this file again
+if __name__ == '__main__':
+
+    # Print that script is starting
+    print("\n#########################################################################################\n")
+    print("                        Benchmark of Model Build and Solve Scaling                           ")
+    print("\n#########################################################################################\n")
+
+    #########################################################################################
+    #                             Benchmark Settings
+    #########################################################################################
+
+    # Number of scenarios, assets and grid points per solve
+    scenarioSizes = [63, 250, 1000, 5000]
+    assetSizes = [10, 100, 400, 800]
+    gridSizes = [1, 10, 50]
+    seed = 0
+
+    # Largest (N, M) of the conic models, which do not finish on the full grid
+    limits = {"ExcessCVaRModelDROCorrelation": (250, 20), "ExcessCVaRModelDROCorrelationFast": (1000, 100)}
+
+    cases = [(modelName, N, M, gridSize) for modelName, N, M, gridSize in itertools.product(MODELS, scenarioSizes, assetSizes, gridSizes)
+             if N <= limits.get(modelName, (N, M))[0] and M <= limits.get(modelName, (N, M))[1]]
+
+    #########################################################################################
+    #                             Run Benchmark
+    #########################################################################################
+
+    print("Running {} cases.\n".format(len(cases)))
+    results = runSuite(cases, seed=seed)
+
+    # Compare with the previous commit in the results file
+    compareCommits()
@@ -0,0 +1,102 @@
+"""
+File: EXPERIMENT_MonteCarlo_OptimizersCurse.py
+Author: Andreas Engly
+Date: 19-10-2026
+Description: This file fits the excess CVaR models (SAA and Wasserstein DRO over a grid of radii) on one training window
+             and evaluates every fitted portfolio on many synthetic test windows drawn from a GBM calibrated on the
+             same window (see EITP/PerformanceEvaluation/MonteCarloEvaluation.py). The gap between the in-sample
+             objective and the distribution of the out-of-sample objective shows the optimizer's curse per radius.
+
+Dependencies:
+- See below.
+
+Inputs:
+- The training window, the radii and the number and length of the test windows can be modified below.
+
+Output:
+- The summaries of the out-of-sample metrics are saved to ./Results/MonteCarlo/.
+
+Note:
+- The test windows are simulated in chunks, so the number of windows is only limited by the run time.
+
+"""
+
+# Load dependencies
+import os
+import datetime as dt
+import numpy as np
+import pandas as pd
+import gc
+
+# Imports from module
+from EITP.Models.ExcessCVaRModelSAA import ExcessCVaRModelSAA as ExcessCVaRModelSAA;
+from EITP.Models.ExcessCVaRModelDRO import ExcessCVaRModelDRO as ExcessCVaRModelDRO;
+from EITP.PerformanceEvaluation.MonteCarloEvaluation import MonteCarloEvaluation;
+from EITP.DataHandlers.DataLoader import DataLoader;
+
+# Print that script is starting
+print("\n#########################################################################################\n")
+print("                    Monte Carlo Out-of-Sample Evaluation (Optimizer's Curse)                 ")
+print("\n#########################################################################################\n")
+
+#########################################################################################
+#                             Loading Market Data
+#########################################################################################
+
+# Start by instantiating the data loader
+dataLoader = DataLoader(path='./Data/');
+allData = dataLoader.AggregateData(intersect=True, filtered=False, startDate="2012-01-01", endDate=dt.datetime.today().strftime("%Y-%m-%d"));
+
+# Format the output
+indexReturns = allData.iloc[1:,1].values
+assetsReturns = allData.iloc[1:,2:].values # (risk-free rate is included here already)
+
+# Then we can free priceData from the memory
+del dataLoader
+del allData
+gc.collect()
+
+#########################################################################################
+#                             Experiment Settings
+#########################################################################################
+
+# Training window (the most recent year) and model parameters
+trainingSize = 250
+beta = 0.95
+rho = 2
+alphaDaily = (1 + 0.05)**(1/252) - 1
+epsCollection = 10**np.linspace(-6, -2, 9)
+
+# Test windows
+nWindows = 20000
+testSize = 63
+chunkSize = 500
+seed = 0
+
+returnsAssetsTrain = assetsReturns[-trainingSize:,:]
+returnsIndexTrain = indexReturns[-trainingSize:]
+
+#########################################################################################
+#                             Fit Portfolios
+#########################################################################################
+
+modelSAA = ExcessCVaRModelSAA(returnsAssets=returnsAssetsTrain, returnsIndex=returnsIndexTrain, beta=beta, rho=rho, alpha=alphaDaily)
+resultsSAA = modelSAA.solve(rhoCollection=np.array([rho]), betaCollection=np.array([beta]), progressBar=False)
+
+modelDRO = ExcessCVaRModelDRO(returnsAssets=returnsAssetsTrain, returnsIndex=returnsIndexTrain, beta=beta, rho=rho, alpha=alphaDaily)
+resultsDRO = modelDRO.solve(epsCollection=epsCollection, rhoCollection=np.array([rho]), betaCollection=np.array([beta]), progressBar=False)
+
+# One row per portfolio (the SAA portfolio first)
+results = pd.concat([resultsSAA.assign(eps=0.0), resultsDRO], axis=0, ignore_index=True)
+
+#########################################################################################
+#                             Monte Carlo Evaluation
+#########################################################################################
+
+evaluation = MonteCarloEvaluation(returnsAssets=returnsAssetsTrain, returnsIndex=returnsIndexTrain, beta=beta, rho=rho, alpha=alphaDaily)
+summary = evaluation.evaluate(results, nWindows=nWindows, T=testSize, chunkSize=chunkSize, seed=seed, inSampleObjective=results["obj"].values)
+summary.insert(1, "eps", results["eps"].values[summary["portfolio"].values])
+
+os.makedirs("./Results/MonteCarlo/", exist_ok=True)
+summary.to_csv("./Results/MonteCarlo/OptimizersCurse_ExcessCVaR.csv", index=False)
+print(summary[summary["metric"] == "Objective"].to_string(index=False))
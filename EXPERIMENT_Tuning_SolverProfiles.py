@@ -0,0 +1,101 @@
+"""
+File: EXPERIMENT_Tuning_SolverProfiles.py
+Author: Andreas Engly
+Date: 19-10-2026
+Description: This file benchmarks a grid of MOSEK parameters (threads, presolve and optimizer) on representative
+             instances of the DRO and SAA models, once for a single large solve and once for a batch of small solves
+             in parallel worker processes. The fastest profile per model class and mode is saved and applied
+             automatically by InvestmentStrategy.applySolverProfile when the models are built.
+
+Dependencies:
+- See below.
+
+Inputs:
+- The instance sizes, the parameter grid and the number of workers can be modified below.
+
+Output:
+- The timings of all profiles are saved to ./Results/Tuning/ and the best profiles to EITP/Auxiliaries/SolverProfiles.json.
+
+Note:
+- Rerun the file on the machine the experiments run on, since the best profile depends on the number of cores.
+
+"""
+
+# Load dependencies
+import os
+import datetime as dt
+import numpy as np
+import gc
+
+# Imports from module
+from EITP.Models.ITMDRO import ITMDRO as ITMDRO;
+from EITP.Models.RAERMDRO import RAERMDRO as RAERMDRO;
+from EITP.Models.ITMSAA import ITMSAA as ITMSAA;
+from EITP.Models.RAERMSAA import RAERMSAA as RAERMSAA;
+from EITP.Auxiliaries.SolverTuning import tuneProfiles, DEFAULT_GRID;
+from EITP.DataHandlers.DataLoader import DataLoader;
+
+# The worker processes of the batch mode import this file again
+if __name__ == '__main__':
+
+    # Print that script is starting
+    print("\n#########################################################################################\n")
+    print("                         Tuning of Solver Profiles per Model Class                           ")
+    print("\n#########################################################################################\n")
+
+    #########################################################################################
+    #                             Loading Market Data
+    #########################################################################################
+
+    # Start by instantiating the data loader
+    dataLoader = DataLoader(path='./Data/');
+    allData = dataLoader.AggregateData(intersect=True, filtered=False, startDate="2012-01-01", endDate=dt.datetime.today().strftime("%Y-%m-%d"));
+
+    # Format the output
+    indexReturns = allData.iloc[1:,1].values
+    assetsReturns = allData.iloc[1:,2:].values # (risk-free rate is included here already)
+
+    # Then we can free priceData from the memory
+    del dataLoader
+    del allData
+    gc.collect()
+
+    #########################################################################################
+    #                             Tuning Settings
+    #########################################################################################
+
+    # Single solve: one year of scenarios on the full universe. Batch: many short windows solved by parallel workers
+    singleScenarios = 500
+    batchScenarios = 100
+    batchSize = 32
+    workers = min(os.cpu_count(), 8)
+
+    # Parameter grid (see DEFAULT_GRID in EITP/Auxiliaries/SolverTuning.py)
+    grid = DEFAULT_GRID
+
+    # Grid points per solve
+    solveArgumentsDRO = dict(epsCollection=np.array([10**(-5), 10**(-3), 10**(-2)]), rhoCollection=np.array([2]), betaCollection=np.array([0.95]))
+    solveArgumentsSAA = dict(rhoCollection=np.array([2]), betaCollection=np.array([0.95]))
+
+    # Windows of consecutive scenarios
+    rng = np.random.default_rng(0)
+    def windows(N, count):
+
+        starts = rng.integers(0, assetsReturns.shape[0] - N, size=count)
+        return [dict(returnsAssets=assetsReturns[start:start+N,:], returnsIndex=indexReturns[start:start+N]) for start in starts]
+
+    #########################################################################################
+    #                             Run Tuning
+    #########################################################################################
+
+    os.makedirs("./Results/Tuning/", exist_ok=True)
+
+    for modelClass, solveArguments in [(ITMDRO, solveArgumentsDRO), (RAERMDRO, solveArgumentsDRO), (ITMSAA, solveArgumentsSAA), (RAERMSAA, solveArgumentsSAA)]:
+
+        print("\nTuning {} (single solve).".format(modelClass.__name__))
+        tuning = tuneProfiles(modelClass, windows(singleScenarios, 1), solveArguments=solveArguments, grid=grid, mode="single")
+        tuning.to_csv("./Results/Tuning/{}_single.csv".format(modelClass.__name__), index=False)
+
+        print("\nTuning {} (parallel batch).".format(modelClass.__name__))
+        tuning = tuneProfiles(modelClass, windows(batchScenarios, batchSize), solveArguments=solveArguments, grid=grid, mode="batch", workers=workers)
+        tuning.to_csv("./Results/Tuning/{}_batch.csv".format(modelClass.__name__), index=False)